@@ -0,0 +1,27 @@
+from file_star.core.export.export_archive import (
+    ARCHIVE_FORMATS,
+    ARCHIVE_NAME,
+    check_archive_format,
+    export_archive,
+)
+from file_star.core.export.export_dedup import DEDUP_MODES, DUPLICATES_NAME, dedup_jobs, find_duplicates
+from file_star.core.export.export_journal import JOURNAL_NAME, ExportJournal
+from file_star.core.export.export_logic import (
+    Exporter,
+    create_export_jobs,
+    create_folders,
+    run_export,
+    schedule_jobs,
+)
+from file_star.core.export.export_manifest import (
+    MANIFEST_NAME,
+    iter_export_plan,
+    iter_manifest,
+    read_manifest_jobs,
+    write_manifest,
+)
+from file_star.core.export.export_options import EXPORT_WORKERS, ExportOptions
+from file_star.core.export.export_progress import ExportCancelledError, ExportProgress
+from file_star.core.export.export_schedule import InsufficientSpaceError, check_free_space, order_jobs
+from file_star.core.export.export_strategies import COPY_CHUNK_SIZE, EXPORT_STRATEGIES, copy_file, get_export_strategy
+from file_star.core.export.export_sync import delete_untracked, file_digest, is_unchanged, sync_jobs
@@ -0,0 +1,152 @@
+import os
+import shutil
+import tarfile
+import zipfile
+
+from loguru import logger
+
+from file_star.core.export.export_strategies import COPY_CHUNK_SIZE
+
+try:
+    import zstandard
+except ImportError:  # optional, tar.zst archives are not available without it
+    zstandard = None
+
+ARCHIVE_NAME = 'file_star_export'  # archive file name in the picked destination folder
+ARCHIVE_FORMATS = {  # format -> extension of the archive
+    'tar': '.tar',
+    'tar.gz': '.tar.gz',
+    'tar.zst': '.tar.zst',
+    'zip': '.zip',
+    'zip_store': '.zip',  # zip without compression
+}
+
+
+def check_archive_format(archive_format: str) -> None:
+    """Fail fast on unknown archive formats and on formats whose optional dependency is missing"""
+
+    if archive_format not in ARCHIVE_FORMATS:
+        raise AttributeError(f'Unknown archive format: {archive_format}, valid formats are {list(ARCHIVE_FORMATS)}')
+
+    if archive_format == 'tar.zst' and zstandard is None:
+        raise AttributeError('tar.zst archives need the zstandard package')
+
+
+def split_volumes(entries: list, volume_size: int = None) -> list:
+    """Split (source file path, archive name) entries into volumes of at most volume size source bytes
+
+    Files are not split, a file larger than the volume size gets a volume of its own.
+    """
+
+    if volume_size is None:
+        return [entries]
+
+    volumes, volume, size = [], [], 0
+    for src, arcname in entries:
+        file_size = os.path.getsize(src) if os.path.exists(src) else 0
+        if volume and size + file_size > volume_size:
+            volumes.append(volume)
+            volume, size = [], 0
+        volume.append((src, arcname))
+        size += file_size
+
+    if volume or not volumes:
+        volumes.append(volume)
+    return volumes
+
+
+def get_volume_path(archive_path: str, archive_format: str, index: int, volumes: int) -> str:
+    """Get the path of a volume, volumes are numbered before the extension if there are several"""
+
+    if volumes == 1:
+        return archive_path
+
+    extension = ARCHIVE_FORMATS[archive_format]
+    base_path = archive_path[: -len(extension)] if archive_path.endswith(extension) else archive_path
+    return f'{base_path}.part{index + 1:03d}{extension}'
+
+
+def write_archive(
+    entries: list, archive_path: str, archive_format: str, chunk_size: int = COPY_CHUNK_SIZE, progress=None
+) -> None:
+    """Stream the sources into one archive under their archive names, memory is bounded by the chunk size"""
+
+    os.makedirs(os.path.dirname(os.path.abspath(archive_path)), exist_ok=True)
+
+    if archive_format in ('zip', 'zip_store'):
+        compression = zipfile.ZIP_STORED if archive_format == 'zip_store' else zipfile.ZIP_DEFLATED
+        with zipfile.ZipFile(archive_path, 'w', compression=compression, allowZip64=True) as archive:
+            for src, arcname in entries:
+                _add_entry(progress, src, lambda src=src, arcname=arcname: _add_zip(archive, src, arcname, chunk_size))
+        return
+
+    with open(archive_path, 'wb') as raw_file:
+        if archive_format == 'tar.zst':
+            file_obj = zstandard.ZstdCompressor().stream_writer(raw_file, closefd=False)
+            mode = 'w|'
+        else:
+            file_obj = raw_file
+            mode = 'w|gz' if archive_format == 'tar.gz' else 'w|'
+
+        with tarfile.open(fileobj=file_obj, mode=mode, bufsize=chunk_size) as archive:
+            for src, arcname in entries:
+                _add_entry(progress, src, lambda src=src, arcname=arcname: _add_tar(archive, src, arcname))
+
+        if file_obj is not raw_file:
+            file_obj.close()  # writes the end of the zstd frame
+
+
+def _add_entry(progress, src: str, add) -> None:
+    """Add one entry, failed entries are collected by the progress if there is one"""
+
+    if progress is None:
+        add()
+        return
+
+    progress.check()
+    try:
+        add()
+    except (OSError, ValueError) as e:
+        progress.add_error(src, e)
+    else:
+        progress.add_done(os.path.getsize(src))
+
+
+def _add_tar(archive: tarfile.TarFile, src: str, arcname: str) -> None:
+    """Stream a file into a tar archive"""
+
+    tar_info = archive.gettarinfo(src, arcname=arcname)
+    with open(src, 'rb') as src_file:
+        archive.addfile(tar_info, src_file)
+
+
+def _add_zip(archive: zipfile.ZipFile, src: str, arcname: str, chunk_size: int) -> None:
+    """Stream a file into a zip archive"""
+
+    zip_info = zipfile.ZipInfo.from_file(src, arcname=arcname, strict_timestamps=False)  # mtimes before 1980
+    zip_info.compress_type = archive.compression
+    with open(src, 'rb') as src_file, archive.open(zip_info, 'w', force_zip64=True) as dst_file:
+        shutil.copyfileobj(src_file, dst_file, chunk_size)
+
+
+def export_archive(jobs: list, archive_path: str, options, progress=None) -> dict:
+    """Export jobs whose targets are in the archive path into archive volumes of the export options, returns a report"""
+
+    archive_format = options.archive
+    check_archive_format(archive_format)
+
+    entries = [(src, os.path.relpath(dst, archive_path).replace(os.sep, '/')) for src, dst in jobs]
+    volumes = split_volumes(entries, options.volume_size)
+    if progress is not None:
+        progress.add_total(len(entries), sum(os.path.getsize(src) for src, _ in entries if os.path.exists(src)))
+
+    archive_paths = []
+    for index, volume in enumerate(volumes):
+        volume_path = get_volume_path(archive_path, archive_format, index, len(volumes))
+        write_archive(volume, volume_path, archive_format, options.chunk_size, progress)
+        archive_paths.append(volume_path)
+        logger.info(f'Archive: {len(volume)} files written to {volume_path}')
+
+    if progress is not None:
+        progress.finish()
+    return {'archives': archive_paths, 'archived_files': len(entries)}
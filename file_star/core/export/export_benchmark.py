@@ -0,0 +1,63 @@
+import argparse
+import os
+import random
+import shutil
+import tempfile
+import time
+
+from loguru import logger
+
+from file_star.core.export.export_logic import Exporter
+from file_star.core.export.export_options import ExportOptions
+from file_star.core.export.export_schedule import order_jobs, stat_sources
+
+
+def create_source(src_path: str, files: int, size: int) -> list:
+    """Create a source tree of random files and get the export jobs into a sibling destination"""
+
+    jobs = []
+    for index in range(files):
+        folder_path_abs = os.path.join(src_path, f'folder_{index % 100:03d}')
+        os.makedirs(folder_path_abs, exist_ok=True)
+        file_path_abs = os.path.join(folder_path_abs, f'file_{index}.bin')
+        with open(file_path_abs, 'wb') as f:
+            f.write(os.urandom(size))
+        jobs.append((file_path_abs, file_path_abs.replace(src_path, f'{src_path}_dst', 1)))
+    return jobs
+
+
+def benchmark(path: str, files: int, size: int, workers: list, locality: bool = False) -> dict:
+    """Export the same source with every worker count and get the seconds per worker count
+
+    Jobs are shuffled like the per filter order of a real export, or ordered by source locality.
+    """
+
+    src_path = os.path.join(path, 'src')
+    jobs = create_source(src_path, files, size)
+    random.Random(0).shuffle(jobs)
+    if locality:
+        jobs = order_jobs(jobs, stat_sources(jobs, max(workers)))
+
+    seconds = {}
+    for worker_count in workers:
+        shutil.rmtree(f'{src_path}_dst', ignore_errors=True)
+        start = time.perf_counter()
+        Exporter(ExportOptions(workers=worker_count))(jobs)
+        seconds[worker_count] = time.perf_counter() - start
+        logger.info(
+            f'{worker_count:>3} workers: {seconds[worker_count]:.2f} s, {files / seconds[worker_count]:.0f} files/s'
+        )
+    return seconds
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Benchmark the export with a growing number of threads')
+    parser.add_argument('--path', default=None, help='Folder on the file system to benchmark, default is a temp folder')
+    parser.add_argument('--files', type=int, default=10_000)
+    parser.add_argument('--size', type=int, default=64 * 1024, help='Bytes per file')
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4, 8, 16, 32])
+    parser.add_argument('--locality', action='store_true', help='Order the jobs by source inode and target folder')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(dir=args.path) as tmp_path:
+        benchmark(tmp_path, args.files, args.size, args.workers, args.locality)
@@ -0,0 +1,105 @@
+import hashlib
+import json
+import os
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+from loguru import logger
+
+from file_star.core.export.export_sync import file_digest
+
+DUPLICATES_NAME = '.file_star_duplicates.jsonl'
+PARTIAL_HASH_SIZE = 64 * 1024  # bytes read from the start and the end of a file for the partial hash
+DEDUP_MODES = ('hardlink', 'manifest')
+
+
+def partial_digest(file_path_abs: str) -> bytes:
+    """Get the blake2b digest of the first and the last bytes of a file"""
+
+    digest = hashlib.blake2b()
+    with open(file_path_abs, 'rb') as f:
+        digest.update(f.read(PARTIAL_HASH_SIZE))
+        f.seek(max(0, os.fstat(f.fileno()).st_size - PARTIAL_HASH_SIZE))
+        digest.update(f.read(PARTIAL_HASH_SIZE))
+    return digest.digest()
+
+
+def _split_groups(groups: list, key, workers: int, progress=None) -> list:
+    """Split groups of file paths by a key computed in parallel, groups of a single file are dropped"""
+
+    def get_key(file_path):
+        if progress is not None:  # hashing can be paused or cancelled before each file
+            progress.check()
+        try:
+            return key(file_path)
+        except OSError:  # not a duplicate, the export of the file reports the error
+            return file_path
+
+    file_paths = [file_path for group in groups for file_path in group]
+    with ThreadPoolExecutor(max_workers=max(1, workers or 1)) as executor:
+        keys = dict(zip(file_paths, executor.map(get_key, file_paths)))
+
+    split_groups = []
+    for group in groups:
+        by_key = defaultdict(list)
+        for file_path in group:
+            by_key[keys[file_path]].append(file_path)
+        split_groups.extend(same for same in by_key.values() if len(same) > 1)
+    return split_groups
+
+
+def find_duplicates(file_paths: list, workers: int = 1, progress=None) -> dict:
+    """Map every duplicate file path to the first file path with the same bytes
+
+    Files are grouped by size, then by a partial hash and only the remaining candidates by a full hash.
+    """
+
+    sizes = {}
+    by_size = defaultdict(list)
+    for file_path in dict.fromkeys(file_paths):  # unique and in order
+        try:
+            size = os.path.getsize(file_path)
+        except OSError:  # vanished, the export of the file reports the error
+            continue
+        if size > 0:  # empty files are cheaper to copy than to link
+            sizes[file_path] = size
+            by_size[size].append(file_path)
+
+    groups = [group for group in by_size.values() if len(group) > 1]
+    groups = _split_groups(groups, partial_digest, workers, progress)
+    small = [group for group in groups if sizes[group[0]] <= 2 * PARTIAL_HASH_SIZE]  # fully hashed
+    large = [group for group in groups if sizes[group[0]] > 2 * PARTIAL_HASH_SIZE]
+    groups = small + _split_groups(large, file_digest, workers, progress)
+    return {duplicate: group[0] for group in groups for duplicate in group[1:]}
+
+
+def dedup_jobs(jobs: list, workers: int = 1, progress=None) -> tuple[list, list]:
+    """Split jobs into the jobs which export distinct content and (original target, source, target) duplicates"""
+
+    duplicates = find_duplicates([src for src, _ in jobs], workers, progress)
+
+    targets = {}  # source -> the first target of its content
+    unique, duplicate_jobs = [], []
+    for src, dst in jobs:
+        original = duplicates.get(src, src)
+        if original in targets:
+            duplicate_jobs.append((targets[original], src, dst))
+        else:
+            targets[original] = dst
+            unique.append((src, dst))
+
+    logger.info(f'Dedup: {len(duplicate_jobs)} of {len(jobs)} files are duplicates')
+    return unique, duplicate_jobs
+
+
+def record_duplicates(dst_path: str, duplicate_jobs: list) -> None:
+    """Write the duplicates to a manifest in the destination instead of exporting them"""
+
+    with open(os.path.join(dst_path, DUPLICATES_NAME), 'w', encoding='utf-8') as f:
+        for original_dst, src, dst in duplicate_jobs:
+            record = {
+                'source': src,
+                'target': os.path.relpath(dst, dst_path),
+                'original': os.path.relpath(original_dst, dst_path),
+            }
+            f.write(json.dumps(record) + '\n')
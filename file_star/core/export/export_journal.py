@@ -0,0 +1,146 @@
+import filecmp
+import json
+import os
+import threading
+
+from loguru import logger
+
+JOURNAL_NAME = '.file_star_journal.jsonl'
+JOURNAL_BATCH_SIZE = 1000  # records written at once, at most one batch is lost on a crash
+
+
+class ExportJournal:
+    """Append only log of completed exports in the destination folder, used to resume an interrupted export"""
+
+    def __init__(self, dst_path: str, resume: bool = False, batch_size: int = JOURNAL_BATCH_SIZE) -> None:
+        self.dst_path = dst_path
+        self.resume = resume
+        self.batch_size = batch_size
+        self.previous = self.load()  # read before a new export truncates the journal
+        self._pending = []
+        self._lock = threading.Lock()  # records come from all export threads
+        self._file = None
+
+    @property
+    def path(self) -> str:
+        """Path of the journal file"""
+        return os.path.join(self.dst_path, JOURNAL_NAME)
+
+    @property
+    def completed(self) -> dict:
+        """Records of the previous export which a resumed export continues"""
+        return self.previous if self.resume else {}
+
+    def __enter__(self):
+        os.makedirs(self.dst_path, exist_ok=True)
+        self._file = open(self.path, 'a' if self.resume else 'w', encoding='utf-8')
+        if self.resume and self._file.tell() > 0 and not self._ends_with_newline():
+            self._file.write('\n')  # terminate a cut off record, appended records start on a new line
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+    def _ends_with_newline(self) -> bool:
+        """Check if the last record of the journal is complete"""
+        with open(self.path, 'rb') as f:
+            f.seek(-1, os.SEEK_END)
+            return f.read(1) == b'\n'
+
+    def load(self) -> dict:
+        """Get the completed records of a previous export by target path relative to the destination"""
+
+        completed = {}
+        if not os.path.isfile(self.path):
+            return completed
+
+        with open(self.path, encoding='utf-8') as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:  # the last line of a crashed export may be cut off
+                    continue
+                completed[record['target']] = record
+        logger.info(f'Journal: {len(completed)} completed exports found in {self.path}')
+        return completed
+
+    def record(self, src: str, dst: str, size: int, mtime: int) -> None:
+        """Record a completed export, records are written in batches"""
+
+        record = {'source': src, 'target': os.path.relpath(dst, self.dst_path), 'size': size, 'mtime': mtime}
+        with self._lock:
+            self._pending.append(json.dumps(record))
+            if len(self._pending) >= self.batch_size:
+                self._flush()
+
+    def record_existing(self, jobs: list) -> None:
+        """Record jobs whose target is already exported, e.g. the unchanged targets of a sync"""
+
+        for src, dst in jobs:
+            stat = os.stat(src)
+            self.record(src, dst, stat.st_size, stat.st_mtime_ns)
+
+    def flush(self) -> None:
+        """Write the pending records to the disk"""
+
+        with self._lock:
+            self._flush()
+
+    def _flush(self) -> None:
+        """Write the pending records, the caller holds the lock"""
+        if self._pending and self._file is not None:
+            self._file.write('\n'.join(self._pending) + '\n')
+            self._file.flush()
+            os.fsync(self._file.fileno())
+            self._pending = []
+
+    def close(self) -> None:
+        """Write the pending records and close the journal"""
+
+        if self._file is not None:
+            self.flush()
+            self._file.close()
+            self._file = None
+
+    def get_pending(self, jobs: list) -> list:
+        """Get the jobs which are not completed, completed jobs are skipped and partially written ones verified"""
+
+        pending = []
+        for src, dst in jobs:
+            if self.is_completed(src, dst):
+                continue
+            if not os.path.exists(src) and os.path.lexists(dst):  # moved before the crash
+                continue
+            if self.is_verified(src, dst):  # written before the crash but its record was not flushed
+                stat = os.stat(src)
+                self.record(src, dst, stat.st_size, stat.st_mtime_ns)
+                continue
+            pending.append((src, dst))
+
+        logger.info(f'Journal: {len(jobs) - len(pending)} of {len(jobs)} exports are completed')
+        return pending
+
+    def is_completed(self, src: str, dst: str) -> bool:
+        """Check if a job is recorded, its source is unchanged and its target has the recorded size"""
+
+        record = self.completed.get(os.path.relpath(dst, self.dst_path))
+        if record is None or record['source'] != src or not os.path.lexists(dst):
+            return False
+
+        if not os.path.exists(src):  # moved files are gone from the source
+            return True
+
+        stat = os.stat(src)
+        if (stat.st_size, stat.st_mtime_ns) != (record['size'], record['mtime']):
+            return False
+        return os.path.getsize(dst) == record['size']
+
+    @staticmethod
+    def is_verified(src: str, dst: str) -> bool:
+        """Check if an unrecorded target exists and has the same bytes as its source"""
+
+        if not os.path.exists(dst) or not os.path.exists(src):
+            return False
+        if os.path.getsize(src) != os.path.getsize(dst):
+            return False
+        return filecmp.cmp(src, dst, shallow=False)
@@ -0,0 +1,215 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import replace
+
+from file_star.core.export.export_archive import export_archive
+from file_star.core.export.export_dedup import dedup_jobs, record_duplicates
+from file_star.core.export.export_journal import ExportJournal
+from file_star.core.export.export_manifest import iter_export_plan
+from file_star.core.export.export_options import ExportOptions
+from file_star.core.export.export_progress import ExportProgress
+from file_star.core.export.export_schedule import check_free_space, order_jobs, stat_sources
+from file_star.core.export.export_strategies import get_export_strategy
+from file_star.core.export.export_sync import delete_untracked, sync_jobs
+
+
+def create_export_jobs(subject_handler, dst_path: str) -> list:
+    """Get the (source file path, destination file path) of every subject of the folder modifications state"""
+
+    return [(src, os.path.join(dst_path, target)) for _, src, target in iter_export_plan(subject_handler)]
+
+
+def create_folders(jobs: list) -> None:
+    """Create every unique destination folder once, before any file is copied"""
+
+    for folder_path_abs in sorted({os.path.dirname(dst) for _, dst in jobs}):
+        os.makedirs(folder_path_abs, exist_ok=True)
+
+
+class Exporter:
+    """Exports jobs with the strategy of the options and a bounded pool of threads"""
+
+    def __init__(self, options: ExportOptions = None, progress: ExportProgress = None) -> None:
+        options = options or ExportOptions()
+        self.workers = max(1, options.workers or 1)
+        self.keep_mtime = options.sync  # synced targets are compared by their mtime
+        self.progress = progress
+        self.export_file = get_export_strategy(options.strategy, options.chunk_size, options.copy_metadata)
+
+    def __call__(self, jobs: list, journal=None, stats: dict = None) -> None:
+        """Create the destination folders and export all jobs, the first failed export is raised
+
+        Completed exports are recorded in the journal if one is given. With a progress, failed exports are
+        collected in it instead and the export can be paused or cancelled. The stats of the sources, if they
+        were already collected, are not taken again.
+        """
+
+        stats = stats or {}
+        if self.progress is not None:
+            self.progress.add_total(len(jobs), sum(_get_size(src, stats) for src, _ in jobs))
+
+        create_folders(jobs)
+
+        if self.workers == 1:
+            for src, dst in jobs:
+                self.export_job(src, dst, journal, stats.get(src))
+            return
+
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            for _ in executor.map(lambda job: self.export_job(*job, journal, stats.get(job[0])), jobs):
+                pass  # consumed to raise errors
+
+    def export_job(self, src: str, dst: str, journal=None, stat: os.stat_result = None) -> None:
+        """Export one file and record it"""
+
+        if self.progress is None:
+            self._export_job(src, dst, journal, stat)
+            return
+
+        self.progress.check()
+        try:
+            size = self._export_job(src, dst, journal, stat)
+        except OSError as e:
+            self.progress.add_error(src, e)
+        else:
+            self.progress.add_done(size)
+
+    def _export_job(self, src: str, dst: str, journal, stat: os.stat_result or None) -> int:
+        """Export one file, returns its size"""
+
+        stat = stat or os.stat(src)  # before a move removes the source
+        self.export_file(src, dst)
+        if self.keep_mtime:
+            os.utime(dst, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+        if journal is not None:
+            journal.record(src, dst, stat.st_size, stat.st_mtime_ns)
+        return stat.st_size
+
+
+def _get_size(file_path_abs: str, stats: dict) -> int:
+    """Get the size of a file from its collected stat or the disk, missing files count as empty"""
+
+    if stats.get(file_path_abs) is not None:
+        return stats[file_path_abs].st_size
+    try:
+        return os.path.getsize(file_path_abs)
+    except OSError:
+        return 0
+
+
+def run_export(
+    jobs: list, dst_path: str, options: ExportOptions = None, progress: ExportProgress = None
+) -> dict or None:
+    """Export jobs into the destination, returns the report of a synced or deduplicated export
+
+    A progress collects failed files instead of raising the first. With an archive format, the destination is
+    the path of the archive which the sources are streamed into.
+    """
+
+    options = options or ExportOptions()
+    options.check()
+
+    if options.archive is not None:
+        jobs, _ = schedule_jobs(jobs, replace(options, strategy='copy'))
+        return export_archive(jobs, dst_path, options, progress)
+
+    report = {} if options.sync or options.dedup else None
+    with ExportJournal(dst_path, options.resume) as journal:
+        pending, duplicate_jobs = select_jobs(jobs, journal, options, report, progress)
+        pending, stats = schedule_jobs(pending, options)
+        Exporter(options, progress)(pending, journal, stats)
+        if options.dedup:
+            export_duplicates(dst_path, duplicate_jobs, journal, options, progress)
+
+    if options.sync and options.delete:
+        report.update(delete_untracked(dst_path, jobs, journal.previous))
+    if progress is not None:
+        progress.finish()
+    return report
+
+
+def select_jobs(
+    jobs: list, journal: ExportJournal, options: ExportOptions, report: dict or None, progress: ExportProgress
+) -> tuple[list, list]:
+    """Get the jobs to export and the duplicate jobs, without completed, unchanged and duplicate jobs
+
+    The report is updated with the synced and duplicate files and bytes, the progress can pause or cancel the
+    comparisons and hashes.
+    """
+
+    pending = jobs
+    if options.resume:
+        pending = journal.get_pending(pending)
+    if options.sync:
+        synced, (pending, sync_report) = pending, sync_jobs(pending, options.checksum, options.workers, progress)
+        journal.record_existing(set(synced) - set(pending))  # a later delete knows all targets of the sync
+        report.update(sync_report)
+
+    duplicate_jobs = []
+    if options.dedup:
+        pending, duplicate_jobs = dedup_jobs(pending, options.workers, progress)
+        report.update(
+            duplicate_files=len(duplicate_jobs),
+            duplicate_bytes=sum(_get_size(src, {}) for _, src, _ in duplicate_jobs),
+        )
+        if options.sync:  # duplicates are not copied
+            report['copied_files'] -= report['duplicate_files']
+            report['copied_bytes'] -= report['duplicate_bytes']
+    return pending, duplicate_jobs
+
+
+def export_duplicates(
+    dst_path: str, duplicate_jobs: list, journal: ExportJournal, options: ExportOptions, progress: ExportProgress
+) -> None:
+    """Hardlink the duplicates to the exported target of their content or record them in a manifest
+
+    A move removes the sources of the duplicates whose content is exported.
+    """
+
+    if options.dedup == 'manifest':
+        record_duplicates(dst_path, duplicate_jobs)
+        exported = [src for original_dst, src, _ in duplicate_jobs if os.path.lexists(original_dst)]
+    else:  # after the exports, the original targets exist
+        Exporter(replace(options, strategy='hardlink', sync=False), progress)(
+            [(original_dst, dst) for original_dst, _, dst in duplicate_jobs]
+        )
+        exported = []
+        for _, src, dst in duplicate_jobs:
+            if os.path.lexists(dst) and os.path.exists(src):  # failed links are collected by the progress
+                stat = os.stat(src)
+                journal.record(src, dst, stat.st_size, stat.st_mtime_ns)
+                exported.append(src)
+
+    if options.strategy == 'move':
+        remove_sources(exported, progress)
+
+
+def remove_sources(file_paths: list, progress: ExportProgress = None) -> None:
+    """Remove the sources of a move, a source listed twice is removed once"""
+
+    for file_path_abs in dict.fromkeys(file_paths):
+        try:
+            os.remove(file_path_abs)
+        except FileNotFoundError:  # already moved
+            continue
+        except OSError as e:
+            if progress is None:
+                raise
+            progress.add_error(file_path_abs, e)
+
+
+def schedule_jobs(jobs: list, options: ExportOptions) -> tuple[list, dict]:
+    """Check the free space of the target file systems and order the jobs by the locality of their sources
+
+    Returns the jobs and the stats of their sources, which are empty if neither is done.
+    """
+
+    if not options.preflight and not options.locality:
+        return jobs, {}
+
+    stats = stat_sources(jobs, options.workers)
+    if options.preflight:
+        check_free_space(jobs, stats, options.strategy)
+    if options.locality:
+        jobs = order_jobs(jobs, stats)
+    return jobs, stats
@@ -0,0 +1,91 @@
+import csv
+import json
+import os
+from collections import defaultdict
+
+from loguru import logger
+
+from file_star.core.subjects.subjects_iterator import PAGE_SIZE
+
+MANIFEST_NAME = 'file_star_manifest.jsonl'
+MANIFEST_FIELDS = ('filter', 'source', 'target')  # target is relative to the destination folder
+
+
+def iter_export_plan(subject_handler, page_size: int = PAGE_SIZE):
+    """Yield the (filter name, source file path, target file path relative) of the folder modifications state
+
+    Subjects are read page by page without copying, lazy states compute one page at a time.
+    """
+
+    filters_iter = subject_handler.folder_modifications
+    for filter_name in filters_iter.get_keys():
+        subjects_iter = filters_iter[filter_name]
+        for start in range(0, len(subjects_iter), page_size):
+            for subject in subjects_iter.get_page(start, start + page_size):
+                new_file_name = f'{subject.new_file_name}.{subject.new_extension}'
+                yield filter_name, subject.file_path_abs, os.path.join(subject.new_folder_path_rel, new_file_name)
+
+
+def get_manifest_format(manifest_path: str) -> str:
+    """Get the format of a manifest from its extension"""
+
+    extension = os.path.splitext(manifest_path)[1].lower()
+    if extension == '.csv':
+        return 'csv'
+    if extension in ('.jsonl', '.json'):
+        return 'jsonl'
+    raise AttributeError(f'Unknown manifest format: {extension}, valid extensions are .jsonl and .csv')
+
+
+def write_manifest(subject_handler, manifest_path: str) -> int:
+    """Stream the export plan to a manifest without touching any data file, returns the number of records"""
+
+    manifest_format = get_manifest_format(manifest_path)
+    os.makedirs(os.path.dirname(os.path.abspath(manifest_path)), exist_ok=True)
+
+    records = 0
+    with open(manifest_path, 'w', encoding='utf-8', newline='') as f:
+        if manifest_format == 'csv':
+            writer = csv.writer(f)
+            writer.writerow(MANIFEST_FIELDS)
+            for row in iter_export_plan(subject_handler):
+                writer.writerow(row)
+                records += 1
+        else:
+            for row in iter_export_plan(subject_handler):
+                f.write(json.dumps(dict(zip(MANIFEST_FIELDS, row))) + '\n')
+                records += 1
+
+    logger.info(f'Manifest: {records} records written to {manifest_path}')
+    return records
+
+
+def iter_manifest(manifest_path: str):
+    """Yield the (filter name, source file path, target file path relative) records of a manifest"""
+
+    manifest_format = get_manifest_format(manifest_path)
+    with open(manifest_path, encoding='utf-8', newline='') as f:
+        if manifest_format == 'csv':
+            for record in csv.DictReader(f):
+                yield record['filter'], record['source'], record['target']
+        else:
+            for line in f:
+                if line.strip():
+                    record = json.loads(line)
+                    yield record['filter'], record['source'], record['target']
+
+
+def read_manifest_jobs(manifest_path: str, dst_path: str) -> tuple[list, dict]:
+    """Get the export jobs of a manifest and its colliding targets, grouped by target"""
+
+    jobs = []
+    targets = defaultdict(list)
+    for filter_name, src, target in iter_manifest(manifest_path):
+        target_norm = os.path.normpath(target)
+        if os.path.isabs(target) or target_norm == os.pardir or target_norm.startswith(os.pardir + os.sep):
+            raise AttributeError(f'Manifest target is outside of the destination: {target}')
+        jobs.append((src, os.path.join(dst_path, target)))
+        targets[target].append((filter_name, src))
+
+    collisions = {target: sources for target, sources in targets.items() if len(sources) > 1}
+    return jobs, collisions
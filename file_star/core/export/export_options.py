@@ -0,0 +1,49 @@
+from dataclasses import dataclass
+
+from file_star.core.export.export_archive import check_archive_format
+from file_star.core.export.export_dedup import DEDUP_MODES
+from file_star.core.export.export_strategies import COPY_CHUNK_SIZE, EXPORT_STRATEGIES
+
+EXPORT_WORKERS = 8  # threads, copies release the gil while waiting on the disk
+
+
+@dataclass
+class ExportOptions:  # pylint: disable=too-many-instance-attributes
+    """Options of an export, the defaults copy the files into a folder with a journal
+
+    The strategy is one of copy, hardlink, reflink, move or symlink, files fall back to a copy if their strategy is
+    not possible, e.g. across devices. Completed files are journaled in the destination, a resumed export skips
+    them. A synced export skips targets with the size and mtime, or the content if checksum, of their source and
+    optionally deletes the targets of the previous export which are not in the plan. Byte identical files are
+    exported once if dedup, duplicates are hardlinked or recorded in a manifest. With an archive format the
+    destination is the archive path, optionally split into volumes of volume size bytes. The preflight checks the
+    free space before anything is written and locality orders the copies by the on disk layout of the sources.
+    """
+
+    workers: int = EXPORT_WORKERS
+    strategy: str = 'copy'
+    chunk_size: int = COPY_CHUNK_SIZE
+    copy_metadata: bool = True
+    resume: bool = False
+    sync: bool = False
+    checksum: bool = False
+    delete: bool = False
+    dedup: str = None
+    archive: str = None
+    volume_size: int = None
+    preflight: bool = True
+    locality: bool = True
+
+    def check(self) -> None:
+        """Fail fast on unknown modes and on options which do not work together"""
+
+        if self.strategy not in EXPORT_STRATEGIES:
+            raise AttributeError(f'Unknown export strategy: {self.strategy}')
+
+        if self.dedup not in (None, *DEDUP_MODES):
+            raise AttributeError(f'Unknown dedup mode: {self.dedup}')
+
+        if self.archive is not None:
+            check_archive_format(self.archive)
+            if self.resume or self.sync or self.delete or self.dedup:
+                raise AttributeError('Resume, sync, delete and dedup are not supported for archive exports')
@@ -0,0 +1,125 @@
+import threading
+import time
+
+MAX_ERRORS = 100  # most recent errors kept for display
+
+
+class ExportCancelledError(Exception):
+    """Raised in the export threads when an export is cancelled"""
+
+
+class ExportProgress:
+    """Thread safe progress of a running export, which can be paused and cancelled from another thread"""
+
+    def __init__(self) -> None:
+        self.phase = 'preparing'  # preparing, exporting, done
+        self.total_files = 0
+        self.total_bytes = 0
+        self.done_files = 0
+        self.done_bytes = 0
+        self.error_count = 0
+        self.errors = []  # (source file path, message), the most recent ones
+        self._lock = threading.Lock()
+        self._running = threading.Event()
+        self._running.set()
+        self._cancelled = threading.Event()
+        self._start = None
+        self._paused_seconds = 0.0
+        self._paused_at = None
+
+    def add_total(self, files: int, size: int) -> None:
+        """Add files and bytes to export, the export phase starts with the first ones"""
+
+        with self._lock:
+            self.total_files += files
+            self.total_bytes += size
+            if self._start is None:
+                self._start = time.monotonic()
+                self.phase = 'exporting'
+
+    def add_done(self, size: int) -> None:
+        """Count an exported file"""
+
+        with self._lock:
+            self.done_files += 1
+            self.done_bytes += size
+
+    def add_error(self, src: str, error: Exception) -> None:
+        """Count a failed file, the export goes on"""
+
+        with self._lock:
+            self.done_files += 1
+            self.error_count += 1
+            self.errors = (self.errors + [(src, str(error))])[-MAX_ERRORS:]
+
+    def finish(self) -> None:
+        """Mark the export as done"""
+        self.phase = 'done'
+
+    def pause(self) -> None:
+        """Pause the export threads before their next file"""
+
+        if self._running.is_set():
+            self._paused_at = time.monotonic()
+            self._running.clear()
+
+    def resume(self) -> None:
+        """Resume paused export threads"""
+
+        if not self._running.is_set():
+            self._paused_seconds += time.monotonic() - self._paused_at
+            self._running.set()
+
+    def cancel(self) -> None:
+        """Cancel the export, files which are being exported are finished"""
+
+        self._cancelled.set()
+        self._running.set()  # paused threads have to wake up to stop
+
+    def is_paused(self) -> bool:
+        """Check if the export is paused"""
+        return not self._running.is_set()
+
+    def is_cancelled(self) -> bool:
+        """Check if the export is cancelled"""
+        return self._cancelled.is_set()
+
+    def check(self) -> None:
+        """Block while paused and raise if cancelled, called by the export threads before every file"""
+
+        self._running.wait()
+        if self._cancelled.is_set():
+            raise ExportCancelledError('Export cancelled')
+
+    def get_elapsed(self) -> float:
+        """Get the seconds spent exporting, paused time excluded"""
+
+        if self._start is None:
+            return 0.0
+        paused = self._paused_seconds + (time.monotonic() - self._paused_at if self.is_paused() else 0.0)
+        return time.monotonic() - self._start - paused
+
+    def get_state(self) -> dict:
+        """Get a consistent snapshot with the throughput in MB/s and the estimated seconds left"""
+
+        with self._lock:
+            elapsed = self.get_elapsed()
+            rate = self.done_bytes / elapsed if elapsed > 0 else 0.0
+            left = self.total_bytes - self.done_bytes
+            if self.total_bytes:
+                fraction = self.done_bytes / self.total_bytes
+            else:  # empty files only
+                fraction = self.done_files / self.total_files if self.total_files else 0.0
+            return {
+                'phase': self.phase,
+                'done_files': self.done_files,
+                'total_files': self.total_files,
+                'done_bytes': self.done_bytes,
+                'total_bytes': self.total_bytes,
+                'fraction': fraction,
+                'mb_per_second': rate / 1e6,
+                'eta_seconds': left / rate if rate > 0 else None,
+                'error_count': self.error_count,
+                'errors': list(self.errors),
+                'paused': self.is_paused(),
+            }
@@ -0,0 +1,106 @@
+import os
+import shutil
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+from loguru import logger
+
+FREE_SPACE_RESERVE = 0.01  # fraction of a file system kept free, metadata and journal need some space too
+LINK_STRATEGIES = ('hardlink', 'move', 'symlink')  # no bytes are written on the same file system
+# reflinks are counted like copies, they fall back to one on file systems without clones, e.g. ext4 or most nas
+
+
+class InsufficientSpaceError(OSError):
+    """Raised before an export when a target file system has not enough free space"""
+
+    def __init__(self, shortages: dict) -> None:
+        self.shortages = shortages  # mount path -> (required bytes, free bytes)
+        message = ', '.join(
+            f'{path} needs {required / 1e9:.2f} GB, {free / 1e9:.2f} GB free'
+            for path, (required, free) in shortages.items()
+        )
+        super().__init__(f'Not enough free space: {message}')
+
+
+def stat_sources(jobs: list, workers: int = 1) -> dict:
+    """Stat every source once in parallel, missing sources map to None"""
+
+    def stat(src):
+        try:
+            return os.stat(src)
+        except OSError:
+            return None
+
+    sources = list(dict.fromkeys(src for src, _ in jobs))
+    with ThreadPoolExecutor(max_workers=max(1, workers or 1)) as executor:
+        return dict(zip(sources, executor.map(stat, sources)))
+
+
+def get_existing_folder(path: str) -> str:
+    """Get the nearest existing folder of a path, the file system of a target which is not created yet"""
+
+    path = os.path.abspath(path)
+    while not os.path.isdir(path):
+        parent = os.path.dirname(path)
+        if parent == path:
+            break
+        path = parent
+    return path
+
+
+def get_device(folder: str, devices: dict, device_paths: dict) -> int:
+    """Get the device of a target folder, the devices and an existing folder per device are cached"""
+
+    if folder not in devices:
+        existing_folder = get_existing_folder(folder)
+        devices[folder] = os.stat(existing_folder).st_dev
+        device_paths.setdefault(devices[folder], existing_folder)
+    return devices[folder]
+
+
+def check_free_space(jobs: list, stats: dict, strategy: str = 'copy', reserve: float = FREE_SPACE_RESERVE) -> None:
+    """Sum the bytes written per target file system and raise if one of them has not enough free space
+
+    Strategies which link or move write no bytes if source and target share the file system, reflinks may not.
+    """
+
+    devices = {}  # target folder -> device, targets share few folders
+    device_paths = {}  # device -> existing folder on it
+    required = defaultdict(int)  # device -> bytes
+    for src, dst in jobs:
+        device = get_device(os.path.dirname(dst), devices, device_paths)
+        stat = stats.get(src)
+        if stat is None or (strategy in LINK_STRATEGIES and stat.st_dev == device):
+            continue
+        required[device] += stat.st_size
+
+    shortages = {}
+    for device, required_bytes in required.items():
+        usage = shutil.disk_usage(device_paths[device])
+        free = usage.free - int(usage.total * reserve)
+        if required_bytes > free:
+            shortages[device_paths[device]] = (required_bytes, max(free, 0))
+
+    if shortages:
+        raise InsufficientSpaceError(shortages)
+    logger.info(f'Preflight: {sum(required.values()) / 1e9:.2f} GB fit on {len(required)} file systems')
+
+
+def order_jobs(jobs: list, stats: dict) -> list:
+    """Order jobs by the physical locality of their sources, grouped by target folder
+
+    Inode numbers follow the on disk layout on most file systems. Jobs of a target folder stay together, in
+    inode order, and the folders are ordered by their first source inode.
+    """
+
+    def locality(job):
+        stat = stats.get(job[0])
+        return (stat.st_dev, stat.st_ino) if stat is not None else (-1, -1)
+
+    folders = defaultdict(list)
+    for job in jobs:
+        folders[os.path.dirname(job[1])].append(job)
+
+    groups = [sorted(folder_jobs, key=locality) for folder_jobs in folders.values()]
+    groups.sort(key=lambda group: locality(group[0]))
+    return [job for group in groups for job in group]
@@ -0,0 +1,200 @@
+import errno
+import functools
+import os
+import shutil
+import sys
+import threading
+
+from loguru import logger
+
+try:
+    import fcntl
+except ImportError:  # not available on windows, reflinks fall back to copies
+    fcntl = None
+
+FICLONE = 0x40049409  # linux ioctl which clones the extents of a file on btrfs, xfs and other cow file systems
+COPY_CHUNK_SIZE = 8 * 1024 * 1024  # bytes per kernel copy call and size of the read buffer per thread
+KERNEL_COPY_ERRNOS = {
+    errno.EXDEV,
+    errno.ENOSYS,
+    errno.EINVAL,
+    errno.EBADF,
+    errno.EOPNOTSUPP,
+    errno.ETXTBSY,
+    errno.EPERM,
+}
+FALLBACK_ERRNOS = {  # the strategy is not possible for this file, e.g. across devices or on the file system
+    errno.EXDEV,
+    errno.EPERM,
+    errno.EMLINK,
+    errno.EINVAL,
+    errno.ENOTTY,
+    errno.EOPNOTSUPP,
+    errno.ENOTSUP,
+}
+
+
+_buffers = threading.local()  # one reused read buffer per export thread
+
+
+def copy_file(src: str, dst: str, chunk_size: int = COPY_CHUNK_SIZE, copy_metadata: bool = True) -> None:
+    """Copy the bytes and optionally the permissions of a file, the bytes are copied by the kernel if possible
+
+    Tries copy_file_range, which can copy without leaving the kernel or even the file server, then sendfile and
+    finally reads into a reused buffer. A method failing in the middle is continued at the same offset by the next.
+    """
+
+    _check_same_file(src, dst)
+    with open(src, 'rb', buffering=0) as src_file, open(dst, 'wb', buffering=0) as dst_file:
+        size = os.fstat(src_file.fileno()).st_size
+        offset = 0
+        for copy_range in (_copy_file_range, _sendfile):
+            offset = copy_range(src_file, dst_file, offset, size, chunk_size)
+            if offset >= size:
+                break
+        else:
+            _readinto(src_file, dst_file, offset, chunk_size)
+
+    if copy_metadata:
+        shutil.copymode(src, dst)
+
+
+def _copy_file_range(src_file, dst_file, offset: int, size: int, chunk_size: int) -> int:
+    """Copy with copy_file_range from the offset, returns the offset where it stopped"""
+
+    if not hasattr(os, 'copy_file_range'):
+        return offset
+
+    try:
+        while offset < size:
+            copied = os.copy_file_range(src_file.fileno(), dst_file.fileno(), chunk_size, offset, offset)
+            if copied == 0:  # the source shrank
+                break
+            offset += copied
+    except OSError as e:
+        if e.errno not in KERNEL_COPY_ERRNOS:
+            raise
+    return offset
+
+
+def _sendfile(src_file, dst_file, offset: int, size: int, chunk_size: int) -> int:
+    """Copy with sendfile from the offset, returns the offset where it stopped"""
+
+    if not hasattr(os, 'sendfile'):
+        return offset
+
+    dst_file.seek(offset)
+    try:
+        while offset < size:
+            copied = os.sendfile(dst_file.fileno(), src_file.fileno(), offset, chunk_size)
+            if copied == 0:
+                break
+            offset += copied
+    except OSError as e:
+        if e.errno not in KERNEL_COPY_ERRNOS | {errno.ENOTSOCK}:  # e.g. macos only sends to sockets
+            raise
+    return offset
+
+
+def _readinto(src_file, dst_file, offset: int, chunk_size: int) -> None:
+    """Copy from the offset to the end through a buffer which is reused by all copies of a thread"""
+
+    buffer = getattr(_buffers, 'buffer', None)
+    if buffer is None or len(buffer) != chunk_size:
+        buffer = _buffers.buffer = bytearray(chunk_size)
+
+    view = memoryview(buffer)
+    src_file.seek(offset)
+    dst_file.seek(offset)
+    while True:
+        read = src_file.readinto(view)
+        if not read:
+            break
+        written = 0
+        while written < read:  # raw writes may be partial
+            written += dst_file.write(view[written:read])
+
+
+def hardlink_file(src: str, dst: str) -> None:
+    """Link the destination to the inode of the source, both names share the same bytes"""
+    _check_same_file(src, dst)
+    _replace_existing(os.link, src, dst)
+
+
+def symlink_file(src: str, dst: str) -> None:
+    """Point the destination to the absolute source path"""
+    _check_same_file(src, dst)
+    _replace_existing(os.symlink, os.path.abspath(src), dst)
+
+
+def move_file(src: str, dst: str) -> None:
+    """Rename the source to the destination, atomic on the same file system"""
+    _check_same_file(src, dst)
+    os.rename(src, dst)
+
+
+def reflink_file(src: str, dst: str) -> None:
+    """Clone the extents of the source, the destination shares the bytes until one of them is written"""
+
+    _check_same_file(src, dst)
+    if fcntl is None or not sys.platform.startswith('linux'):
+        raise OSError(errno.EOPNOTSUPP, 'Reflinks are not supported on this platform', src)
+
+    with open(src, 'rb') as src_file, open(dst, 'wb') as dst_file:
+        fcntl.ioctl(dst_file.fileno(), FICLONE, src_file.fileno())
+    shutil.copymode(src, dst)
+
+
+EXPORT_STRATEGIES = {  # name -> export one file, every strategy falls back to a copy if it is not possible
+    'copy': copy_file,
+    'hardlink': hardlink_file,
+    'reflink': reflink_file,
+    'move': move_file,
+    'symlink': symlink_file,
+}
+
+
+def get_export_strategy(strategy: str, chunk_size: int = COPY_CHUNK_SIZE, copy_metadata: bool = True):
+    """Get the export function of a strategy, which copies a file if the strategy fails for it
+
+    A move which falls back to a copy removes the source after it is copied.
+    """
+
+    if strategy not in EXPORT_STRATEGIES:
+        raise AttributeError(f'Unknown export strategy: {strategy}')
+
+    copy = functools.partial(copy_file, chunk_size=chunk_size, copy_metadata=copy_metadata)
+    export_file = EXPORT_STRATEGIES[strategy]
+    if export_file is copy_file:
+        return copy
+
+    def export_file_or_copy(src: str, dst: str) -> None:
+        try:
+            export_file(src, dst)
+        except OSError as e:
+            if e.errno not in FALLBACK_ERRNOS:
+                raise
+            logger.debug(f'{strategy} not possible, file is copied: {src} -> {e.strerror}')
+            copy(src, dst)
+            if export_file is move_file:  # a move across devices is a copy and a removal, like shutil.move
+                shutil.copystat(src, dst)
+                os.remove(src)
+
+    return export_file_or_copy
+
+
+def _check_same_file(src: str, dst: str) -> None:
+    """Raise if the destination is the source, truncating or replacing it would destroy the source"""
+
+    if os.path.exists(dst) and os.path.samefile(src, dst):
+        raise shutil.SameFileError(f'{src} and {dst} are the same file')
+
+
+def _replace_existing(link, src: str, dst: str) -> None:
+    """Create a link, an existing destination is replaced like a copy would overwrite it"""
+
+    try:
+        link(src, dst)
+    except FileExistsError:
+        os.remove(dst)
+        link(src, dst)
@@ -0,0 +1,109 @@
+import hashlib
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+from loguru import logger
+
+
+def file_digest(file_path_abs: str) -> bytes:
+    """Get the blake2b digest of the bytes of a file"""
+
+    with open(file_path_abs, 'rb') as f:
+        return hashlib.file_digest(f, 'blake2b').digest()
+
+
+def is_unchanged(src: str, dst: str, checksum: bool = False) -> bool:
+    """Check if the target of a job is identical to its source, by size and mtime or by size and content"""
+
+    try:
+        src_stat = os.stat(src)
+        dst_stat = os.stat(dst)
+        if src_stat.st_size != dst_stat.st_size:
+            return False
+        if checksum:
+            return file_digest(src) == file_digest(dst)
+    except OSError:  # missing or unreadable, the export of the job reports the error
+        return False
+    return src_stat.st_mtime_ns == dst_stat.st_mtime_ns  # synced targets keep the mtime of their source
+
+
+def sync_jobs(jobs: list, checksum: bool = False, workers: int = 1, progress=None) -> tuple[list, dict]:
+    """Get the jobs whose target is missing or changed and a report of the files and bytes to copy and to skip
+
+    With a progress, the comparison can be paused or cancelled before each job.
+    """
+
+    def compare(job):
+        if progress is not None:
+            progress.check()
+        return is_unchanged(*job, checksum)
+
+    with ThreadPoolExecutor(max_workers=max(1, workers or 1)) as executor:
+        unchanged = list(executor.map(compare, jobs))
+
+    pending = []
+    report = {'copied_files': 0, 'copied_bytes': 0, 'skipped_files': 0, 'skipped_bytes': 0}
+    for (src, dst), skip in zip(jobs, unchanged):
+        size = _get_size(src)
+        if skip:
+            report['skipped_files'] += 1
+            report['skipped_bytes'] += size
+        else:
+            pending.append((src, dst))
+            report['copied_files'] += 1
+            report['copied_bytes'] += size
+
+    logger.info(f'Sync: {report["skipped_files"]} of {len(jobs)} files are unchanged')
+    return pending, report
+
+
+def _get_size(file_path_abs: str) -> int:
+    """Get the size of a file, vanished files count as empty and fail when they are exported"""
+
+    try:
+        return os.path.getsize(file_path_abs)
+    except OSError:
+        return 0
+
+
+def delete_untracked(dst_path: str, jobs: list, records: dict) -> dict:
+    """Delete the targets of a previous export which are not a target of the jobs, and the emptied folders
+
+    The records are the journal of the previous export, only the files it wrote which still have their recorded
+    size and mtime are deleted, any other file of the destination is kept.
+    """
+
+    targets = {os.path.normpath(dst) for _, dst in jobs}
+    report = {'deleted_files': 0, 'deleted_bytes': 0}
+    for target, record in records.items():
+        file_path_abs = os.path.normpath(os.path.join(dst_path, target))
+        if file_path_abs in targets or not is_recorded(file_path_abs, record):
+            continue
+        os.remove(file_path_abs)
+        report['deleted_files'] += 1
+        report['deleted_bytes'] += record['size']
+        remove_empty_folders(os.path.dirname(file_path_abs), dst_path)
+
+    logger.info(f'Sync: {report["deleted_files"]} files are deleted from {dst_path}')
+    return report
+
+
+def is_recorded(file_path_abs: str, record: dict) -> bool:
+    """Check if a file still has the size and mtime which its journal record has"""
+
+    try:
+        stat = os.stat(file_path_abs)
+    except OSError:
+        return False
+    return (stat.st_size, stat.st_mtime_ns) == (record['size'], record['mtime'])
+
+
+def remove_empty_folders(folder_path_abs: str, dst_path: str) -> None:
+    """Remove a folder and its parents below the destination while they are empty"""
+
+    dst_path = os.path.normpath(dst_path)
+    while folder_path_abs != dst_path and folder_path_abs.startswith(dst_path + os.sep):
+        if os.listdir(folder_path_abs):
+            return
+        os.rmdir(folder_path_abs)
+        folder_path_abs = os.path.dirname(folder_path_abs)
@@ -1,67 +1,82 @@
 import os
-import re
 
-from loguru import logger
+from file_star.core.mods.mod_helpers import (
+    add_prefix_suffix_names,
+    compile_replace_stages,
+    compile_split_stages,
+    config_hash,
+    replace_names,
+    split_names,
+)
 
 
-def new_file_name(subject, states):
+def new_file_name(file_names, states):
     """Create a new file name"""
 
-    subject = _propagate(subject, states['name'])
-    return subject
+    return [states['name']] * len(file_names)
 
 
-def split_file_name_parts(subject, states):
+def split_file_name_parts(file_names, stages):
     """Strip the file name parts"""
 
-    for _, values in states.items():
-        if values['split'] is None or values['start'] is None or values['end'] is None:
-            continue
+    return split_names(file_names, stages)
 
-        if values['start'] > values['end']:
-            continue
 
-        if values['start'] < 0 or values['end'] < 0:
-            continue
+def replace_file_name_parts(file_names, stages):
+    """Replace the old file name with the new file name"""
 
-        if values['split'] in subject.new_file_name:
-            file_base_name = subject.new_file_name.split(values['split'])
-            if values['end'] <= len(file_base_name):
-                _new_file_name = f'{values["split"]}'.join(file_base_name[values['start'] : values['end'] + 1])
-                subject = _propagate(subject, _new_file_name)
+    return replace_names(file_names, stages)
 
-    return subject
 
+def add_file_prefix_suffix(file_names, fixes):
+    """Add a prefix/suffix to the file name"""
 
-def replace_file_name_parts(subject, states):
-    """Replace the old file name with the new file name"""
+    return add_prefix_suffix_names(file_names, fixes)
 
-    for _, values in states.items():
-        if values['old'] is None or values['new'] is None:
-            continue
 
-        try:
-            if re.search(values['old'], subject.new_file_name):
-                _new_file_name = re.sub(values['old'], values['new'], subject.new_file_name)
-                subject = _propagate(subject, _new_file_name)
-        except re.error as e:
-            logger.warning(f"Regex error occurred for file name replacement: {e}")
+FILE_MODIFICATIONS = {  # mod name -> (compile states, apply compiled states to the column of file names)
+    'new_file_name': (dict, new_file_name),
+    'split_file_name_parts': (compile_split_stages, split_file_name_parts),
+    'replace_file_name_parts': (compile_replace_stages, replace_file_name_parts),
+    'add_file_prefix_suffix': (dict, add_file_prefix_suffix),
+}
 
-    return subject
 
+class FileModPlan:
+    """File modifications of one filter, compiled once and applied step by step to the whole filter"""
 
-def add_file_prefix_suffix(subject, fixes):
-    """Add a prefix/suffix to the file name"""
+    def __init__(self, file_modifications: dict) -> None:
+        self.plan_hash = config_hash(['file', file_modifications])
+        self.steps = []
+        for mod_name, states in file_modifications.items():
+            if isinstance(states, dict):  # False and None mark disabled mods
+                compile_states, apply_states = FILE_MODIFICATIONS[mod_name]
+                self.steps.append((apply_states, compile_states(states)))
 
-    if fixes['prefix'] is not None:
-        _new_file_name = f'{fixes["prefix"]}{subject.new_file_name}'
-        subject = _propagate(subject, _new_file_name)
+    def __call__(self, subject):
+        """Apply all modifications to a subject"""
 
-    if fixes['suffix'] is not None:
-        _new_file_name = f'{subject.new_file_name}{fixes["suffix"]}'
-        subject = _propagate(subject, _new_file_name)
+        return self.apply_subjects([subject])[0]
 
-    return subject
+    def apply_subjects(self, subjects: list, pool=None, memo=None) -> list:
+        """Apply all modifications to the file name column, derived paths are rebuilt once at the end"""
+
+        def compute(names):
+            return pool.map(self.apply, names) if pool is not None else self.apply(names)
+
+        file_names = [subject.new_file_name for subject in subjects]
+        file_names = memo.map(self.plan_hash, file_names, compute) if memo is not None else compute(file_names)
+        for subject, file_name in zip(subjects, file_names):
+            if file_name != subject.new_file_name:
+                _propagate(subject, file_name)
+        return subjects
+
+    def apply(self, file_names: list) -> list:
+        """Apply all modifications to a column of file names"""
+
+        for apply_states, states in self.steps:
+            file_names = apply_states(file_names, states)
+        return file_names
 
 
 def _propagate(subject, new_file_name):
@@ -1,36 +1,32 @@
-# pylint: disable=W0611
-
-import copy
-import os
-import shutil
-
-from file_star.core.handler import Handler
-from file_star.core.mods.file.file_mod_logic import (  # needed for file_modifications
-    add_file_prefix_suffix,
-    new_file_name,
-    replace_file_name_parts,
-    split_file_name_parts,
-)
-from file_star.core.mods.folder.folder_mod_logic import (  # needed for new_folder_modifications
-    add_folder_prefix_suffix,
-    find_folder_by_level,
-    find_folder_by_name,
-    create_folder_from_file_name,
-    new_folder_name,
-    replace_folder_name_parts,
-    split_folder_name_parts,
+from file_star.core.export import (
+    ExportOptions,
+    create_export_jobs,
+    read_manifest_jobs,
+    run_export,
+    write_manifest,
 )
+from file_star.core.handler import Handler
+from file_star.core.mods.file.file_mod_logic import FileModPlan
+from file_star.core.mods.folder.folder_helpers import DestinationCollisionError, check_destination_collisions
+from file_star.core.mods.folder.folder_mod_logic import FolderModPlan, folder_name_patterns
+from file_star.core.mods.mod_helpers import config_hash
+from file_star.core.mods.mod_pool import ModPool
+from file_star.core.mods.sample_helpers import estimate_collision_rate, estimate_totals, stratified_sample
 from file_star.core.mods.search import (
-    Extension,
-    FileName,
-    FolderNames,
+    SearchBudget,
     SearchFilter,
     check_for_inactive_search,
+    check_regex,
     check_search_collisions,
+    compile_search_statements,
     create_search_statements,
 )
 from file_star.core.subjects.filters_iterator import FiltersIterator
-from file_star.core.subjects.subjects_iterator import SubjectsIterator
+from file_star.core.subjects.subjects_iterator import LazySubjectsIterator, SubjectsIterator
+
+SEARCH_TIME_BUDGET = 60  # seconds, a search exceeding it fails instead of blocking the gui
+PREVIEW_SIZE = 20  # sampled matches per filter of a search preview
+PREVIEW_SCAN = 100_000  # subjects scanned by a search preview, the total of larger sources is estimated
 
 
 class FilterLogic(Handler):
@@ -42,9 +38,18 @@ class FilterLogic(Handler):
         super().__init__()
         self.__dict__ = self._shared_state  # Assign the shared state to the instance's __dict__
         self.filter_names = []
-
-    def apply_search(self, subject_handler):
-        """Apply a search to a list of file paths"""
+        self.stage_cache = {}  # stage -> filter name -> (upstream token and config, subjects iterator or estimate)
+        self.sample_weights = None  # file path -> number of files a sampled file stands for, None if not sampled
+        self.memo_store = None  # optional on disk memo of rename results, shared across sessions
+
+    def apply_search(
+        self,
+        subject_handler,
+        time_budget: float = SEARCH_TIME_BUDGET,
+        sample_size: int = None,
+        seed: int = 0,
+    ):
+        """Apply a search to a list of file paths, optionally to a stratified sample of them"""
 
         if subject_handler.original is None:
             return None, None, None
@@ -55,20 +60,34 @@ class FilterLogic(Handler):
         sf = SearchFilter()
         filter_statements = create_search_statements(self.search)  # self.search is from BORG
 
+        self.prune_cached('search', filter_statements)  # removed or renamed filters
         filters_iter = FiltersIterator()
         if filter_statements:
             self.filter_names = list(filter_statements.keys())
 
-            subjects = subject_handler.get_subjects_per_filters(
-                state='original', filter_name='original', attribute=None
-            )
+            original_iter = subject_handler.original['original']
+            if sample_size is not None:  # the following stages run on the sample as well
+                original_iter = self.get_sample(original_iter, sample_size, seed)
+            else:
+                self.sample_weights = None
+            subjects = original_iter.get()  # read only, later stages work on copies
 
-            for filter_name in filter_statements:
-                subjects_per_filter = []
-                for subject in sf.filter(subjects['original'], eval(filter_statements[filter_name])):
-                    subjects_per_filter.append(subject)
+            keys, changed = {}, {}
+            for filter_name, filter_statement in filter_statements.items():
+                keys[filter_name] = (original_iter.token, filter_statement)
+                if not self.is_cached('search', filter_name, keys[filter_name]):
+                    changed[filter_name] = filter_statement  # only new or changed filters are searched
+
+            specs = compile_search_statements(changed)  # identical leaves are evaluated once per subject
+            subjects_per_filters = {filter_name: [] for filter_name in specs}
+            for filter_name, subject in sf.filter_many(subjects, specs, SearchBudget(time_budget)):
+                subjects_per_filters[filter_name].append(subject)
 
-                filters_iter[filter_name] = SubjectsIterator(subjects_per_filter)
+            for filter_name, subjects_per_filter in subjects_per_filters.items():
+                self.set_cached('search', filter_name, keys[filter_name], SubjectsIterator(subjects_per_filter))
+
+            for filter_name in filter_statements:
+                filters_iter[filter_name] = self.get_cached('search', filter_name)
 
             inactive_search = check_for_inactive_search(filters_iter)
             collision = check_search_collisions(filters_iter)
@@ -76,7 +95,32 @@ class FilterLogic(Handler):
 
         return None, None, None
 
-    def apply_file_modifications(self, subject_handler):
+    def preview_search(
+        self,
+        subject_handler,
+        sample_size: int = PREVIEW_SIZE,
+        max_scan: int = PREVIEW_SCAN,
+        seed: int = None,
+        time_budget: float = SEARCH_TIME_BUDGET,
+    ) -> dict or None:
+        """Preview a search with a uniform sample of sample_size matches per filter
+
+        Returns per filter the sampled subjects and the estimated total of matches, at most max_scan subjects at
+        random positions are scanned.
+        """
+
+        if subject_handler.original is None or len(getattr(subject_handler.original, 'original')) == 0:
+            return None
+
+        filter_statements = create_search_statements(self.search)  # self.search is from BORG
+        if not filter_statements:
+            return None
+
+        specs = compile_search_statements(filter_statements)
+        subjects = subject_handler.original.get('original')  # read only, no copy needed
+        return SearchFilter().sample_many(subjects, specs, sample_size, max_scan, seed, SearchBudget(time_budget))
+
+    def apply_file_modifications(self, subject_handler, workers: int = None, lazy: bool = False):
         """Apply file modifications to a list of file paths"""
 
         if subject_handler.search is None:
@@ -85,22 +129,14 @@ class FilterLogic(Handler):
         if self.file_modifications is None:
             return None
 
-        filters_iter = FiltersIterator()
-        for filter_name, subjects in subject_handler.get_subjects_per_filters(state='search', attribute=None).items():
-            subjects_per_filter = []
-            for subject in subjects:
-                tmp_subject = copy.deepcopy(subject)
+        for filter_name, mods in self.file_modifications.items():
+            self.check_replace_regexes(filter_name, mods.get('replace_file_name_parts'))
 
-                for mod_name in self.file_modifications[filter_name]:
-                    if self.file_modifications[filter_name][mod_name]:
-                        tmp_subject = eval(mod_name)(tmp_subject, self.file_modifications[filter_name][mod_name])
-
-                subjects_per_filter.append(tmp_subject)
-            filters_iter[filter_name] = SubjectsIterator(subjects_per_filter)
-
-        return filters_iter
+        return self.apply_stage(
+            subject_handler, 'search', 'file_modifications', self.file_modifications, FileModPlan, workers, lazy
+        )
 
-    def apply_folder_modifications(self, subject_handler):
+    def apply_folder_modifications(self, subject_handler, workers: int = None, lazy: bool = False):
         """Apply folder modifications to a list of file paths"""
 
         if subject_handler.file_modifications is None:
@@ -109,41 +145,119 @@ class FilterLogic(Handler):
         if self.folder_modifications is None:
             return None
 
+        for filter_name, folder_structs in self.folder_modifications.items():
+            for mods in folder_structs.values():
+                self.check_replace_regexes(filter_name, mods.get('replace_folder_name_parts'))
+                if isinstance(mods.get('find_folder_by_name'), dict):
+                    for pattern in folder_name_patterns(mods['find_folder_by_name']):
+                        check_regex(filter_name, pattern)
+
+        return self.apply_stage(
+            subject_handler,
+            'file_modifications',
+            'folder_modifications',
+            self.folder_modifications,
+            FolderModPlan,
+            workers,
+            lazy,
+        )
+
+    def apply_stage(self, subject_handler, upstream: str, stage: str, modifications: dict, plan_class, workers, lazy):
+        """Apply compiled modification plans per filter, unchanged filters are taken from the stage cache
+
+        A filter is recomputed only if its config or its upstream subjects changed, reused outputs keep their
+        token so the change propagates to the following stages. Lazy outputs are computed page by page on demand.
+        """
+
+        filter_names = getattr(subject_handler, upstream).get_keys()
+        self.prune_cached(stage, filter_names)  # filters which are no longer searched
+
         filters_iter = FiltersIterator()
-        for filter_name, subjects in subject_handler.get_subjects_per_filters(
-                state='file_modifications', attribute=None
-        ).items():
-            subjects_per_filter = []
-            for subject in subjects:
-                tmp_folder_names = []
-                for folder_struct in self.folder_modifications[filter_name]:
-                    tmp_subject = copy.deepcopy(subject)
-                    for mod_name in self.folder_modifications[filter_name][folder_struct]:
-                        if self.folder_modifications[filter_name][folder_struct][mod_name]:
-                            tmp_subject = eval(mod_name)(
-                                tmp_subject, self.folder_modifications[filter_name][folder_struct][mod_name]
-                            )
-
-                    if tmp_subject.new_folder_path_rel:
-                        tmp_folder_names.append(tmp_subject.new_folder_path_rel)
-
-                if tmp_folder_names:  # if there are folder modifications else use the original folder path
-                    new_folder_path_rel = os.path.join(*tmp_folder_names)
-                else:
-                    new_folder_path_rel = subject.folder_path_rel
-
-                subject.new_folder_path_rel = new_folder_path_rel
-                new_file = f'{subject.new_file_name}.{subject.new_extension}'
-                subject.new_file_path_rel = os.path.join(new_folder_path_rel, new_file)
-
-                subjects_per_filter.append(subject)
-
-            filters_iter[filter_name] = SubjectsIterator(subjects_per_filter)
+        with ModPool(workers) as pool:  # large filters are streamed through worker processes in chunks
+            for filter_name in filter_names:
+                upstream_iter = getattr(subject_handler, upstream)[filter_name]
+                key = (upstream_iter.token, config_hash(modifications[filter_name]))
+
+                if not self.is_cached(stage, filter_name, key):
+                    plan = plan_class(modifications[filter_name])  # compiled once per filter
+                    if lazy:
+                        subjects_iter = LazySubjectsIterator(upstream_iter, plan, memo=self.memo_store)
+                    else:
+                        subjects = subject_handler.get_subjects_per_filters(upstream, filter_name)  # copies
+                        subjects = subjects[filter_name]
+                        subjects_iter = SubjectsIterator(plan.apply_subjects(subjects, pool, self.memo_store))
+                    self.set_cached(stage, filter_name, key, subjects_iter)
+
+                filters_iter[filter_name] = self.get_cached(stage, filter_name)
 
         return filters_iter
 
+    def get_sample(self, original_iter, sample_size: int, seed: int):
+        """Get a stratified sample of the original subjects, cached until the source or the sample size changes"""
+
+        key = (original_iter.token, sample_size, seed)
+        if not self.is_cached('sample', 'original', key):
+            subjects, weights = stratified_sample(original_iter.get(), sample_size, seed)
+            self.set_cached('sample', 'original', key, (SubjectsIterator(subjects), weights))
+
+        sample_iter, self.sample_weights = self.get_cached('sample', 'original')
+        return sample_iter
+
+    def estimate_state(self, subject_handler, state: str) -> dict or None:
+        """Estimate the number of files per filter of the full source, None if the state is not sampled"""
+
+        if self.sample_weights is None or getattr(subject_handler, state) is None:
+            return None
+
+        key = (subject_handler.get_version(state), self.sample_weights)  # estimated once per state and sample
+        if not self.is_cached('estimate', state, key):
+            estimate = estimate_totals(getattr(subject_handler, state), self.sample_weights)
+            self.set_cached('estimate', state, key, estimate)
+        return self.get_cached('estimate', state)
+
+    def estimate_collisions(self, subject_handler) -> tuple[int, float] or None:
+        """Estimate the colliding destinations of the full source, None if the state is not sampled"""
+
+        if self.sample_weights is None or subject_handler.folder_modifications is None:
+            return None
+
+        key = (subject_handler.get_version('folder_modifications'), self.sample_weights)
+        if not self.is_cached('collision_estimate', 'folder_modifications', key):
+            estimate = estimate_collision_rate(subject_handler.folder_modifications, self.sample_weights)
+            self.set_cached('collision_estimate', 'folder_modifications', key, estimate)
+        return self.get_cached('collision_estimate', 'folder_modifications')
+
+    def is_cached(self, stage: str, filter_name: str, key) -> bool:
+        """Check if the stage output of a filter was computed with the same upstream and config"""
+        entry = self.stage_cache.get(stage, {}).get(filter_name)
+        return entry is not None and entry[0] == key
+
+    def get_cached(self, stage: str, filter_name: str):
+        """Get the cached stage output of a filter"""
+        return self.stage_cache[stage][filter_name][1]
+
+    def set_cached(self, stage: str, filter_name: str, key, subjects_iter) -> None:
+        """Cache the stage output of a filter"""
+        self.stage_cache.setdefault(stage, {})[filter_name] = (key, subjects_iter)
+
+    def prune_cached(self, stage: str, filter_names) -> None:
+        """Drop the cached stage outputs of filters which are not in filter names"""
+        cached = self.stage_cache.get(stage, {})
+        for filter_name in set(cached) - set(filter_names):
+            del cached[filter_name]
+
     @staticmethod
-    def apply_new_structure(subject_handler, dst_path: str) -> None:
+    def check_replace_regexes(filter_name: str, states) -> None:
+        """Fail fast on replacement regexes prone to catastrophic backtracking"""
+
+        if isinstance(states, dict):
+            for values in states.values():
+                check_regex(filter_name, values['old'])
+
+    @staticmethod
+    def apply_new_structure(
+        subject_handler, dst_path: str, options: ExportOptions = None, progress=None
+    ) -> dict or None:
         """Apply new structure to a list of file paths"""
 
         if subject_handler.folder_modifications is None:
@@ -152,11 +266,31 @@ class FilterLogic(Handler):
         if dst_path is None:
             raise AttributeError('No destination path provided.')
 
-        subject_per_filters = subject_handler.get_subjects_per_filters(state='folder_modifications', attribute=None)
-        for _, subjects in subject_per_filters.items():
-            for subject in subjects:
-                new_folder_path_abs = os.path.join(dst_path, subject.new_folder_path_rel)
-                os.makedirs(new_folder_path_abs, exist_ok=True)
-                tmp_new_file_name = f'{subject.new_file_name}.{subject.new_extension}'
-                new_file_path_abs = os.path.join(new_folder_path_abs, tmp_new_file_name)
-                shutil.copy(subject.file_path_abs, new_file_path_abs)
+        collisions = check_destination_collisions(subject_handler.folder_modifications)
+        if collisions:  # checked before any file is copied
+            raise DestinationCollisionError(collisions)
+
+        jobs = create_export_jobs(subject_handler, dst_path)
+        return run_export(jobs, dst_path, options, progress)
+
+    @staticmethod
+    def write_manifest(subject_handler, manifest_path: str) -> int:
+        """Write the export plan to a jsonl or csv manifest instead of exporting, returns the number of records"""
+
+        if subject_handler.folder_modifications is None:
+            raise AttributeError('No folder modifications provided.')
+
+        return write_manifest(subject_handler, manifest_path)
+
+    @staticmethod
+    def apply_manifest(manifest_path: str, dst_path: str, options: ExportOptions = None, progress=None) -> dict or None:
+        """Export the plan of a manifest with the export options"""
+
+        if dst_path is None:
+            raise AttributeError('No destination path provided.')
+
+        jobs, collisions = read_manifest_jobs(manifest_path, dst_path)
+        if collisions:
+            raise DestinationCollisionError(collisions)
+
+        return run_export(jobs, dst_path, options, progress)
@@ -0,0 +1,84 @@
+import copy
+import os
+from collections import defaultdict
+
+from file_star.core.subjects.filters_iterator import FiltersIterator
+from file_star.core.subjects.subjects_iterator import SubjectsIterator
+
+
+class DestinationCollisionError(ValueError):
+    """Raised when several subjects are mapped to the same destination"""
+
+    def __init__(self, collisions: dict) -> None:
+        self.collisions = collisions
+        super().__init__(f'{len(collisions)} destinations are targeted by more than one file')
+
+
+def _target_key(new_file_path_rel: str, ignore_case: bool) -> str:
+    """Get the key of a destination, case insensitive file systems treat a.txt and A.txt as the same file"""
+    return new_file_path_rel.casefold() if ignore_case else new_file_path_rel
+
+
+def check_destination_collisions(filters_iter, ignore_case: bool = False) -> dict:
+    """Check if several subjects are mapped to the same new file path, grouped by target"""
+
+    targets = defaultdict(list)  # one hash index over all filters
+    for filter_name, subjects in filters_iter.get_per_filter(attribute=None).items():
+        for subject in subjects:
+            targets[_target_key(subject.new_file_path_rel, ignore_case)].append((filter_name, subject.file_path_rel))
+
+    return {target: sources for target, sources in targets.items() if len(sources) > 1}
+
+
+def resolve_destination_collisions(filters_iter, ignore_case: bool = False) -> tuple[FiltersIterator, int]:
+    """Resolve colliding destinations with deterministic suffixes, the first subject keeps its name
+
+    Renamed subjects are copies, the given filters iterator stays untouched. Returns the resolved filters iterator
+    and the number of renamed subjects.
+    """
+
+    subjects_per_filter = filters_iter.get_per_filter(attribute=None)
+    taken = set()
+    for subjects in subjects_per_filter.values():
+        for subject in subjects:
+            taken.add(_target_key(subject.new_file_path_rel, ignore_case))
+
+    seen = set()
+    renamed = 0
+    resolved = FiltersIterator()
+    for filter_name, subjects in subjects_per_filter.items():
+        resolved_subjects = []
+        for subject in subjects:
+            target = _target_key(subject.new_file_path_rel, ignore_case)
+            if target in seen:
+                subject = _with_free_suffix(subject, taken, ignore_case)
+            else:
+                seen.add(target)
+            resolved_subjects.append(subject)
+
+        renamed_per_filter = sum(1 for old, new in zip(subjects, resolved_subjects) if old is not new)
+        if renamed_per_filter:
+            resolved[filter_name] = SubjectsIterator(resolved_subjects)
+            renamed += renamed_per_filter
+        else:
+            resolved[filter_name] = filters_iter[filter_name]  # unchanged filters keep their token
+
+    return resolved, renamed
+
+
+def _with_free_suffix(subject, taken: set, ignore_case: bool):
+    """Copy a subject and add the first free numeric suffix to its file name"""
+
+    index = 1
+    while True:
+        new_file_name = f'{subject.new_file_name}_{index}'
+        new_file_path_rel = os.path.join(subject.new_folder_path_rel, f'{new_file_name}.{subject.new_extension}')
+        if _target_key(new_file_path_rel, ignore_case) not in taken:
+            break
+        index += 1
+
+    subject = copy.copy(subject)
+    subject.new_file_name = new_file_name
+    subject.new_file_path_rel = new_file_path_rel
+    taken.add(_target_key(new_file_path_rel, ignore_case))
+    return subject
@@ -3,17 +3,40 @@ import re
 
 from loguru import logger
 
+from file_star.core.mods.mod_helpers import (
+    add_prefix_suffix,
+    compile_replace_stages,
+    compile_split_stages,
+    config_hash,
+    replace_name,
+    split_name,
+)
 from file_star.core.mods.search.search_logic import Filter, Specification
 from file_star.core.mods.search.search_tokens import create_filter_logic, tokenize_filter_string
 
 
 class FolderNames(Specification):
-    """Search for folder name specifications"""
+    """Search for folder name specifications, as plain text or as regex"""
 
-    def __init__(self, *args) -> None:
+    def __init__(self, *args, regex: bool = False) -> None:
         self.folder_name = args
+        self.regex = regex
+        self._patterns = []
+        if regex:
+            for folder_name in args:
+                try:
+                    self._patterns.append(re.compile(folder_name))
+                except re.error as e:
+                    logger.warning(f"Regex error occurred for folder names: {e}")
 
     def is_satisfied(self, folder) -> bool:
+        if self.regex:
+            for pattern in self._patterns:
+                match = pattern.search(folder)
+                if match and match.group() != '':
+                    return True
+            return False
+
         if any(x for x in self.folder_name if x in folder):
             return True
         return False
@@ -28,115 +51,171 @@ class SearchFilter(Filter):
                 yield folder
 
 
-def find_folder_by_level(subject, states):
+def find_folder_by_level(folder_name, folder_path_rel, _file_name, states):
     """Find a folder by its level"""
 
-    folders = subject.folder_path_rel.split(os.sep)
-    if states['level'] < len(folders):
-        subject.new_folder_path_rel = folders[states['level']]
+    folders = folder_path_rel.split(os.sep)
+    if states['level'] is not None and states['level'] < len(folders):
+        return folders[states['level']]
 
-    return subject
+    return folder_name
 
 
-def find_folder_by_name(subject, states):
-    """Find a folder by its name"""
+def folder_name_patterns(states) -> list:
+    """Get the search tags of a folder name selector which are used as regex"""
+
+    search_tokens = tokenize_filter_string(states['name']) if states.get('regex') else None
+    if not search_tokens:
+        return []
+    return [token.lstrip('~') for token in search_tokens if token not in ('&', '|', '[', ']')]
+
+
+def compile_folder_name_selector(states) -> Specification or None:
+    """Compile the search tags of a folder name selector once into a specification"""
 
     search_tokens = tokenize_filter_string(states['name'])
     if search_tokens is None:
-        return subject
+        return None
+
+    search_filter = create_filter_logic(search_tokens, 'FolderNames', regex=states.get('regex'))
+    if not search_filter:
+        return None
 
-    search_filter = create_filter_logic(search_tokens, 'FolderNames')
-    if search_filter is None:
-        return subject
+    return eval(search_filter)
+
+
+def find_folder_by_name(folder_name, folder_path_rel, _file_name, spec):
+    """Find a folder by its name"""
+
+    if spec is None:
+        return folder_name
 
     sf = SearchFilter()
-    folders = subject.folder_path_rel.split(os.sep)
-    for folder in sf.filter(folders, eval(search_filter)):
-        subject.new_folder_path_rel = folder
-        return subject
+    folders = folder_path_rel.split(os.sep)
+    for folder in sf.filter(folders, spec):
+        return folder
 
-    return subject
+    return folder_name
 
 
-def new_folder_name(subject, states):
+def new_folder_name(_folder_name, _folder_path_rel, _file_name, states):
     """Create a new folder name"""
 
-    subject.new_folder_path_rel = states['name']
-    return subject
+    return states['name']
 
 
-def split_folder_name_parts(subject, states):
-    """Strip the file name parts"""
+def split_folder_name_parts(folder_name, _folder_path_rel, _file_name, stages):
+    """Strip the folder name parts"""
 
-    for _, values in states.items():
-        if values['split'] is None or values['start'] is None or values['end'] is None:
-            continue
+    if folder_name is None:
+        return folder_name
+    return split_name(folder_name, stages)
 
-        if values['start'] > values['end']:
-            continue
 
-        if values['start'] < 0 or values['end'] < 0:
-            continue
+def replace_folder_name_parts(folder_name, _folder_path_rel, _file_name, stages):
+    """Replace the old folder name with the new folder name"""
 
-        if values['split'] in subject.new_folder_path_rel:
-            folder_names = subject.new_folder_path_rel.split(values['split'])
+    if folder_name is None:
+        return folder_name
+    return replace_name(folder_name, stages)
 
-            if values['end'] <= len(folder_names):
-                subject.new_folder_path_rel = f'{values["split"]}'.join(
-                    folder_names[values['start'] : values['end'] + 1]
-                )
 
-    return subject
+def add_folder_prefix_suffix(folder_name, _folder_path_rel, _file_name, fixes):
+    """Add a prefix/suffix to the folder name"""
 
+    return add_prefix_suffix(folder_name, fixes)
 
-def replace_folder_name_parts(subject, states):
-    """Replace the old file name with the new file name"""
 
-    for _, values in states.items():
-        if values['old'] is None or values['new'] is None:
-            continue
+def create_folder_from_file_name(folder_name, _folder_path_rel, file_name, stages):
+    """Create folder name from file name"""
 
-        try:
-            if re.search(values['old'], subject.new_folder_path_rel):
-                subject.new_folder_path_rel = re.sub(values['old'], values['new'], subject.new_folder_path_rel)
+    for split, start, end in stages:
+        if split in file_name:
+            folder_names = file_name.split(split)
 
-        except re.error as e:
-            logger.warning(f"Regex error occurred for folder name replacement: {e}")
+            if end <= len(folder_names):
+                folder_name = split.join(folder_names[start : end + 1])
 
-    return subject
+    return folder_name
 
 
-def add_folder_prefix_suffix(subject, fixes):
-    """Add a prefix/suffix to the file name"""
+FOLDER_MODIFICATIONS = {  # mod name -> (compile states, apply compiled states to the folder name, reads file name)
+    'find_folder_by_level': (dict, find_folder_by_level, False),
+    'find_folder_by_name': (compile_folder_name_selector, find_folder_by_name, False),
+    'new_folder_name': (dict, new_folder_name, False),
+    'create_folder_from_file_name': (compile_split_stages, create_folder_from_file_name, True),
+    'split_folder_name_parts': (compile_split_stages, split_folder_name_parts, False),
+    'replace_folder_name_parts': (compile_replace_stages, replace_folder_name_parts, False),
+    'add_folder_prefix_suffix': (dict, add_folder_prefix_suffix, False),
+}
 
-    if fixes['prefix'] is not None:
-        subject.new_folder_path_rel = f'{fixes["prefix"]}{subject.new_folder_path_rel}'
 
-    if fixes['suffix'] is not None:
-        subject.new_folder_path_rel = f'{subject.new_folder_path_rel}{fixes["suffix"]}'
+class FolderStructPlan:
+    """Folder modifications of one folder struct, memoized per unique folder path"""
 
-    return subject
+    def __init__(self, folder_modifications: dict) -> None:
+        self.steps = []
+        self.uses_file_name = False
+        for mod_name, states in folder_modifications.items():
+            if isinstance(states, dict):  # False and None mark disabled mods
+                compile_states, apply_states, uses_file_name = FOLDER_MODIFICATIONS[mod_name]
+                self.steps.append((apply_states, compile_states(states)))
+                self.uses_file_name = self.uses_file_name or uses_file_name
 
+        self._memo = {}
 
-def create_folder_from_file_name(subject, states):
-    """Create folder name from file name"""
+    def __call__(self, folder_name, folder_path_rel, file_name) -> str or None:
+        """Get the new folder name, folder only steps are computed once per folder path"""
+
+        key = (folder_name, folder_path_rel, file_name if self.uses_file_name else None)
+        if key not in self._memo:
+            self._memo[key] = self.apply(*key)
+        return self._memo[key]
+
+    def apply(self, folder_name, folder_path_rel, file_name) -> str or None:
+        """Apply all modifications to a folder name"""
+
+        for apply_states, states in self.steps:
+            folder_name = apply_states(folder_name, folder_path_rel, file_name, states)
+        return folder_name
+
+
+class FolderModPlan:
+    """Folder modifications of one filter, compiled once and applied to every subject"""
+
+    def __init__(self, folder_modifications: dict) -> None:
+        self.plan_hash = config_hash(['folder', folder_modifications])
+        self.struct_plans = [FolderStructPlan(mods) for mods in folder_modifications.values()]
+
+    def __call__(self, subject):
+        """Apply all folder structs to a subject"""
+
+        return self.apply_subjects([subject])[0]
+
+    def apply_subjects(self, subjects: list, pool=None, memo=None) -> list:
+        """Apply all folder structs to subjects, optionally in the worker processes of a pool and through a memo"""
 
-    for _, values in states.items():
-        if values['split'] is None or values['start'] is None or values['end'] is None:
-            continue
+        def compute(rows):
+            return pool.map(self.apply, rows) if pool is not None else self.apply(rows)
 
-        if values['start'] > values['end']:
-            continue
+        rows = [(subject.new_folder_path_rel, subject.folder_path_rel, subject.new_file_name) for subject in subjects]
+        new_folder_paths_rel = memo.map(self.plan_hash, rows, compute) if memo is not None else compute(rows)
 
-        if values['start'] < 0 or values['end'] < 0:
-            continue
+        for subject, new_folder_path_rel in zip(subjects, new_folder_paths_rel):
+            subject.new_folder_path_rel = new_folder_path_rel
+            new_file = f'{subject.new_file_name}.{subject.new_extension}'
+            subject.new_file_path_rel = os.path.join(new_folder_path_rel, new_file)
+        return subjects
 
-        if values['split'] in subject.new_file_name:
-            folder_names = subject.new_file_name.split(values['split'])
+    def apply(self, rows: list) -> list:
+        """Get the new folder path of (new folder path, folder path, file name) rows"""
 
-            if values['end'] <= len(folder_names):
-                subject.new_folder_path_rel = f'{values["split"]}'.join(
-                    folder_names[values['start'] : values['end'] + 1]
-                )
+        new_folder_paths_rel = []
+        for row in rows:
+            folder_names = [folder_name for folder_name in (plan(*row) for plan in self.struct_plans) if folder_name]
 
-    return subject
+            if folder_names:  # if there are folder modifications else use the original folder path
+                new_folder_paths_rel.append(os.path.join(*folder_names))
+            else:
+                new_folder_paths_rel.append(row[1])
+        return new_folder_paths_rel
@@ -0,0 +1,92 @@
+import json
+import os
+import sqlite3
+import time
+
+from loguru import logger
+
+MEMO_PATH = os.path.join(os.path.expanduser('~'), '.file_star', 'memo.sqlite')
+MEMO_MAX_ENTRIES = 2_000_000  # least recently written entries beyond it are evicted
+BATCH_SIZE = 500  # keys per query, below the sqlite limit of bound variables
+
+
+class MemoStore:
+    """On disk memo of mod plan results, keyed by the plan hash and the plan input, plans are pure functions of it"""
+
+    def __init__(self, path: str = MEMO_PATH, max_entries: int = MEMO_MAX_ENTRIES) -> None:
+        self.path = path
+        self.max_entries = max_entries
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        self._connection.execute('PRAGMA journal_mode=WAL')  # a lost write only loses memoized results
+        self._connection.execute('PRAGMA synchronous=NORMAL')
+        self._connection.execute(
+            'CREATE TABLE IF NOT EXISTS memo (key TEXT PRIMARY KEY, value TEXT NOT NULL, used INTEGER NOT NULL)'
+        )
+        self._connection.execute('CREATE INDEX IF NOT EXISTS memo_used ON memo (used)')
+        self._connection.commit()
+
+    def map(self, plan_hash: str, rows: list, function) -> list:
+        """Get the results of rows from the memo, only the missing distinct rows are computed by the function"""
+
+        keys = [self.get_key(plan_hash, row) for row in rows]
+        hits = self.get_many(list(dict.fromkeys(keys)))
+
+        missing = {}  # key -> first row of it, rows repeat e.g. for the files of one folder
+        for key, row in zip(keys, rows):
+            if key not in hits:
+                missing.setdefault(key, row)
+        computed = dict(zip(missing, function(list(missing.values())))) if missing else {}
+        self.set_many(computed)
+
+        logger.debug(f'Memo: {len(rows) - len(missing)} of {len(rows)} rows reused')
+        hits.update(computed)
+        return [hits[key] for key in keys]
+
+    @staticmethod
+    def get_key(plan_hash: str, row) -> str:
+        """Get the memo key of a plan input row"""
+        return f'{plan_hash}:{json.dumps(row)}'
+
+    def get_many(self, keys: list) -> dict:
+        """Get the stored results of keys, one query per batch of keys"""
+
+        hits = {}
+        for start in range(0, len(keys), BATCH_SIZE):
+            batch = keys[start : start + BATCH_SIZE]
+            placeholders = ','.join('?' * len(batch))
+            query = f'SELECT key, value FROM memo WHERE key IN ({placeholders})'
+            for key, value in self._connection.execute(query, batch):
+                hits[key] = json.loads(value)
+        return hits
+
+    def set_many(self, results: dict) -> None:
+        """Store results and evict the least recently used entries beyond the max entries"""
+
+        if not results:
+            return
+
+        used = time.time_ns()
+        self._connection.executemany(
+            'INSERT OR REPLACE INTO memo (key, value, used) VALUES (?, ?, ?)',
+            ((key, json.dumps(value), used) for key, value in results.items()),
+        )
+
+        (entries,) = self._connection.execute('SELECT COUNT(*) FROM memo').fetchone()
+        if entries > self.max_entries:
+            self._connection.execute(
+                'DELETE FROM memo WHERE key IN (SELECT key FROM memo ORDER BY used LIMIT ?)',
+                (entries - self.max_entries,),
+            )
+        self._connection.commit()
+
+    def clear(self) -> None:
+        """Remove all entries"""
+
+        self._connection.execute('DELETE FROM memo')
+        self._connection.commit()
+
+    def close(self) -> None:
+        """Close the connection to the memo file"""
+
+        self._connection.close()
@@ -0,0 +1,66 @@
+import argparse
+import os
+import time
+
+from loguru import logger
+
+from file_star.core.mods.file.file_mod_logic import FileModPlan
+from file_star.core.mods.mod_pool import ModPool
+
+FILE_MODIFICATIONS = {  # a split, two replacements and a suffix, a typical rename of a filter
+    'new_file_name': False,
+    'split_file_name_parts': {
+        'first': {'split': '_', 'start': 0, 'end': 2},
+        'second': {'split': None, 'start': None, 'end': None},
+        'third': {'split': None, 'start': None, 'end': None},
+    },
+    'replace_file_name_parts': {
+        'first': {'old': '[0-9]+', 'new': 'N'},
+        'second': {'old': 'run', 'new': 'r'},
+        'third': {'old': None, 'new': ''},
+    },
+    'add_file_prefix_suffix': {'prefix': None, 'suffix': '_x'},
+}
+
+
+def create_file_names(files: int) -> list:
+    """Create a column of file names like the ones of a large source"""
+
+    return [f'sub-{index % 1000:04d}_ses-{index % 3}_run-{index}_T1w' for index in range(files)]
+
+
+def benchmark(files: int, workers: list) -> dict:
+    """Apply the same mod plan in process and with every worker count, get the seconds per worker count
+
+    The pooled runs include the start of the worker processes and the pickling of the chunks, like a
+    modification applied from the gui. Worker count 1 is the in process run.
+    """
+
+    plan = FileModPlan(FILE_MODIFICATIONS)
+    file_names = create_file_names(files)
+
+    seconds = {}
+    expected = None
+    for worker_count in workers:
+        start = time.perf_counter()
+        with ModPool(worker_count, threshold=0) as pool:
+            results = pool.map(plan.apply, file_names)
+        seconds[worker_count] = time.perf_counter() - start
+
+        if expected is None:
+            expected = results
+        elif results != expected:
+            raise ValueError(f'{worker_count} workers changed the results')
+        logger.info(
+            f'{worker_count:>3} workers: {seconds[worker_count]:.2f} s, {files / seconds[worker_count]:.0f} files/s'
+        )
+    return seconds
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Benchmark mod plans in process against the process pool')
+    parser.add_argument('--files', type=int, default=1_000_000)
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4, os.cpu_count()])
+    args = parser.parse_args()
+
+    benchmark(args.files, args.workers)
@@ -0,0 +1,95 @@
+import hashlib
+import json
+import re
+
+from loguru import logger
+
+
+def config_hash(config) -> str:
+    """Hash a modification config, equal configs give equal hashes"""
+
+    return hashlib.sha256(json.dumps(config, sort_keys=True, default=str).encode()).hexdigest()
+
+
+def compile_split_stages(states: dict) -> list:
+    """Validate the split stages once, invalid stages are dropped"""
+
+    stages = []
+    for _, values in states.items():
+        if not values['split'] or values['start'] is None or values['end'] is None:
+            continue
+
+        if values['start'] > values['end']:
+            continue
+
+        if values['start'] < 0 or values['end'] < 0:
+            continue
+
+        stages.append((values['split'], values['start'], values['end']))
+    return stages
+
+
+def compile_replace_stages(states: dict) -> list:
+    """Compile the replacement regexes once, invalid stages are dropped"""
+
+    stages = []
+    for _, values in states.items():
+        if values['old'] is None or values['new'] is None:
+            continue
+
+        try:
+            stages.append((re.compile(values['old']), values['new']))
+        except re.error as e:
+            logger.warning(f"Regex error occurred for name replacement: {e}")
+    return stages
+
+
+def split_names(names: list, stages: list) -> list:
+    """Split names by the split char and keep the parts in range start to end index, one pass per stage"""
+
+    for split, start, end in stages:
+        parts = [name.split(split) for name in names]  # one part if the split char is missing
+        names = [
+            split.join(name_parts[start : end + 1]) if 1 < len(name_parts) and end <= len(name_parts) else name
+            for name, name_parts in zip(names, parts)
+        ]
+    return names
+
+
+def replace_names(names: list, stages: list) -> list:
+    """Replace the old name parts with the new name parts, one pass per stage"""
+
+    for pattern, new in stages:
+        sub = pattern.sub
+        names = [sub(new, name) for name in names]
+    return names
+
+
+def add_prefix_suffix_names(names: list, fixes: dict) -> list:
+    """Add a prefix/suffix to names"""
+
+    if fixes['prefix'] is not None:
+        names = [f'{fixes["prefix"]}{name}' for name in names]
+
+    if fixes['suffix'] is not None:
+        names = [f'{name}{fixes["suffix"]}' for name in names]
+
+    return names
+
+
+def split_name(name: str, stages: list) -> str:
+    """Split a name by the split char and keep the parts in range start to end index"""
+
+    return split_names([name], stages)[0]
+
+
+def replace_name(name: str, stages: list) -> str:
+    """Replace the old name parts with the new name parts"""
+
+    return replace_names([name], stages)[0]
+
+
+def add_prefix_suffix(name: str, fixes: dict) -> str:
+    """Add a prefix/suffix to a name"""
+
+    return add_prefix_suffix_names([name], fixes)[0]
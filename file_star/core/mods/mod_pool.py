@@ -0,0 +1,47 @@
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+PARALLEL_THRESHOLD = 100_000  # rows, smaller inputs are not worth the process overhead
+CHUNK_SIZE = 25_000  # rows per task shipped to a worker
+# workers are not forked from the gui process, a fork copies its threads and locks in whatever state they are in
+START_METHOD = 'forkserver' if 'forkserver' in multiprocessing.get_all_start_methods() else 'spawn'
+
+
+class ModPool:
+    """Process pool which applies compiled mod plans to chunks of rows, small inputs stay in process"""
+
+    def __init__(self, workers: int = None, threshold: int = PARALLEL_THRESHOLD, chunk_size: int = CHUNK_SIZE) -> None:
+        self.workers = workers
+        self.threshold = threshold
+        self.chunk_size = chunk_size
+        self._executor = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.shutdown()
+
+    def map(self, function, rows: list) -> list:
+        """Apply a function to chunks of rows, the function maps a list of rows to a list of results in order"""
+
+        if self.workers is None or self.workers <= 1 or len(rows) < self.threshold:
+            return function(rows)
+
+        if self._executor is None:  # started once and reused by all filters
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers, mp_context=multiprocessing.get_context(START_METHOD)
+            )
+
+        chunks = [rows[index : index + self.chunk_size] for index in range(0, len(rows), self.chunk_size)]
+        results = []
+        for chunk_result in self._executor.map(function, chunks):  # map keeps the order of the chunks
+            results.extend(chunk_result)
+        return results
+
+    def shutdown(self) -> None:
+        """Stop the worker processes"""
+
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
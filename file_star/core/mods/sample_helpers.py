@@ -0,0 +1,77 @@
+import heapq
+import os
+import random
+from collections import defaultdict
+
+from file_star.core.mods.folder.folder_helpers import check_destination_collisions
+
+
+def stratified_sample(subjects: list, size: int, seed: int = None) -> tuple[list, dict]:
+    """Draw a sample of at most size subjects stratified by top level folder and extension
+
+    Every stratum is sampled proportionally to its size, but at least once. If the strata outnumber the sample
+    size, a stratum can not be sampled at least once, the subjects are sampled uniformly instead, which samples the
+    strata proportionally on average. Returns the sampled subjects in their original order and the weight per
+    sampled file path, the number of subjects a sampled subject stands for.
+    """
+
+    if size >= len(subjects):
+        return list(subjects), {subject.file_path_rel: 1.0 for subject in subjects}
+
+    strata = defaultdict(list)
+    for index, subject in enumerate(subjects):
+        strata[(subject.folder_path_rel.split(os.sep, 1)[0], subject.extension)].append(index)
+    if len(strata) > size:
+        strata = {None: range(len(subjects))}
+
+    rng = random.Random(seed)
+    sampled_indices = []
+    weights = {}
+    for indices, stratum_size in zip(strata.values(), allocate_sample(strata.values(), size, len(subjects))):
+        for index in rng.sample(indices, stratum_size):
+            sampled_indices.append(index)
+            weights[subjects[index].file_path_rel] = len(indices) / stratum_size
+
+    sampled_indices.sort()
+    return [subjects[index] for index in sampled_indices], weights
+
+
+def allocate_sample(strata, size: int, total: int) -> list:
+    """Allocate a sample size proportionally to strata, at least one per stratum and at most size in total
+
+    Rounding up and the minimum of one can exceed the size, the excess is taken from the largest allocations.
+    """
+
+    allocation = [min(len(indices), max(1, round(size * len(indices) / total))) for indices in strata]
+    largest = [(-stratum_size, position) for position, stratum_size in enumerate(allocation)]
+    heapq.heapify(largest)
+    for _ in range(sum(allocation) - size):
+        stratum_size, position = heapq.heappop(largest)
+        allocation[position] -= 1
+        heapq.heappush(largest, (stratum_size + 1, position))
+    return allocation
+
+
+def estimate_totals(filters_iter, weights: dict) -> dict:
+    """Estimate the number of files per filter of the full source from a sampled state
+
+    Only the original paths are weighted, lazy filters are not computed for it.
+    """
+
+    estimates = {}
+    for filter_name in filters_iter.get_keys():
+        subjects = filters_iter[filter_name].get_originals()
+        estimates[filter_name] = round(sum(weights.get(subject.file_path_rel, 1.0) for subject in subjects))
+    return estimates
+
+
+def estimate_collision_rate(filters_iter, weights: dict) -> tuple[int, float]:
+    """Estimate the number and the rate of files with colliding destinations from a sampled state
+
+    Collisions between a sampled and an unsampled file are not visible in a sample, the estimate is a lower bound.
+    """
+
+    collisions = check_destination_collisions(filters_iter)
+    colliding = sum(weights.get(file_path_rel, 1.0) for sources in collisions.values() for _, file_path_rel in sources)
+    total = sum(estimate_totals(filters_iter, weights).values())
+    return round(colliding), colliding / total if total else 0.0
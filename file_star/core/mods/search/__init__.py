@@ -1,3 +1,15 @@
 from file_star.core.mods.search.search_helpers import check_for_inactive_search, check_search_collisions
-from file_star.core.mods.search.search_logic import Extension, FileName, FolderNames, SearchFilter
+from file_star.core.mods.search.search_logic import (
+    Extension,
+    FileName,
+    FolderNames,
+    SearchFilter,
+    compile_search_statements,
+)
+from file_star.core.mods.search.search_safety import (
+    RegexSafetyError,
+    SearchBudget,
+    SearchTimeoutError,
+    check_regex,
+)
 from file_star.core.mods.search.search_tokens import create_search_statements
@@ -1,23 +1,22 @@
-from itertools import combinations
+from itertools import combinations, islice
 
 
-def check_search_collisions(filters_iter):
-    """Check if a filter is already in the filter store"""
+def check_search_collisions(filters_iter, limit: int = 5):
+    """Check if a filter is already in the filter store, reports at most limit example collisions per pair"""
 
     filter_file_paths_rel = filters_iter.get_per_filter(attribute='file_path_rel')
+    filter_file_paths_set = {filter_name: set(paths) for filter_name, paths in filter_file_paths_rel.items()}
     filter_names = list(filter_file_paths_rel.keys())
     filter_combinations = [combo for combo in combinations(filter_names, 2) if combo[0] != combo[1]]
 
     collisions = {}
     for combo in filter_combinations:
-        if set(filter_file_paths_rel[combo[0]]) & set(filter_file_paths_rel[combo[1]]):
-            colliding_paths = list(set(filter_file_paths_rel[combo[0]]) & set(filter_file_paths_rel[combo[1]]))
+        other_paths = filter_file_paths_set[combo[1]]
+        colliding_paths = (path for path in filter_file_paths_rel[combo[0]] if path in other_paths)
+        colliding_paths = list(islice(colliding_paths, limit))  # stop after the example collisions
+        if colliding_paths:
             collisions[f'{combo[0]}_&_{combo[1]}'] = colliding_paths
 
-    for key in collisions.keys():
-        if len(collisions[key]) > 5:  # limit example collisions to 5
-            collisions[key] = collisions[key][:5]
-
     return collisions
 
 
@@ -1,9 +1,13 @@
-import os
+import random
 import re
+import unicodedata
 from abc import ABC, abstractmethod
+from itertools import islice
 
 from loguru import logger
 
+from file_star.core.mods.search.search_safety import SearchBudget, check_regex
+
 
 class Specification(ABC):
     """Abstract class for specifications"""
@@ -63,63 +67,97 @@ class Filter(ABC):
         """Abstract method for filtering"""
 
 
-class FileName(Specification):
-    """Search for file name specifications with regex"""
+class LeafSpecification(Specification):
+    """Abstract class for leaf specifications, identical leaves are shared between filters"""
 
-    def __init__(self, *args) -> None:
-        self.file_names = args
-
-    def is_satisfied(self, subject) -> bool:
-        """Check if a file name is satisfied by a specification"""
-        for file_name in self.file_names:
+    def __init__(self, *args, fold: bool = False) -> None:
+        self.args = args
+        self.fold = fold
+        self._patterns = self._compile(args)
+        self._last_subject = None
+        self._last_result = False
+
+    def _compile(self, patterns: tuple) -> list:
+        """Compile the regex patterns once, invalid patterns are skipped"""
+        compiled = []
+        for pattern in patterns:
             try:
-                if (
-                    bool(re.search(file_name, subject.file_base_name))
-                    and re.search(file_name, subject.file_base_name).group() != ''
-                ):
-                    return True
+                if self.fold:  # matched case insensitive against NFC normalized names
+                    compiled.append(re.compile(unicodedata.normalize('NFC', pattern), re.IGNORECASE))
+                else:
+                    compiled.append(re.compile(pattern))
             except re.error as e:
-                logger.warning(f"Regex error occurred for file names: {e}")
+                logger.warning(f"Regex error occurred for {type(self).__name__}: {e}")
+        return compiled
+
+    def _search(self, value: str) -> bool:
+        """Check if any pattern matches a non empty part of the value"""
+        for pattern in self._patterns:
+            match = pattern.search(value)
+            if match and match.group() != '':
+                return True
         return False
 
+    @property
+    def key(self) -> tuple:
+        """Get the key which identifies identical leaves"""
+        return type(self).__name__, self.args, self.fold
 
-class FolderNames(Specification):
-    """Search for folder name specifications with regex"""
-
-    def __init__(self, *args) -> None:
-        self.folder_name = args
+    @abstractmethod
+    def evaluate(self, subject) -> bool:
+        """Abstract method for evaluating a leaf on a subject"""
 
     def is_satisfied(self, subject) -> bool:
+        """Evaluate a leaf at most once per subject"""
+        if subject is not self._last_subject:
+            self._last_result = self.evaluate(subject)
+            self._last_subject = subject
+        return self._last_result
+
+
+class FileName(LeafSpecification):
+    """Search for file name specifications with regex"""
+
+    def evaluate(self, subject) -> bool:
+        """Check if a file name is satisfied by a specification"""
+        return self._search(subject.file_base_name_folded if self.fold else subject.file_base_name)
+
+
+class FolderNames(LeafSpecification):
+    """Search for folder name specifications with regex"""
+
+    def evaluate(self, subject) -> bool:
         """Check if a folder name is satisfied by a specification"""
-        folders = subject.folder_path_rel.split(os.sep)
-        for folder_name in self.folder_name:
-            for folder in folders:
-                try:
-                    if bool(re.search(folder_name, folder)) and re.search(folder_name, folder).group() != '':
-                        return True
-                except re.error as e:
-                    logger.warning(f"Regex error occurred for folder names: {e}")
-        return False
+        folders = subject.folder_names_folded if self.fold else subject.folder_names
+        return any(self._search(folder) for folder in folders)
 
 
-class Extension(Specification):
+class Extension(LeafSpecification):
     """Search for extension specifications with regex"""
 
-    def __init__(self, *args) -> None:
-        self.extension = args
-
-    def is_satisfied(self, subject) -> bool:
+    def evaluate(self, subject) -> bool:
         """Check if an extension is satisfied by a specification"""
-        for extension in self.extension:
-            try:
-                if (
-                    bool(re.search(extension, subject.extension))
-                    and re.search(extension, subject.extension).group() != ''
-                ):
-                    return True
-            except re.error as e:
-                logger.warning(f"Regex error occurred for extension: {e}")
-        return False
+        return self._search(subject.extension_folded if self.fold else subject.extension)
+
+
+class Reservoir:
+    """Uniform reservoir sample of a stream of unknown length"""
+
+    def __init__(self, size: int, rng: random.Random) -> None:
+        self.size = size
+        self.rng = rng
+        self.items = []
+        self.seen = 0
+
+    def add(self, item) -> None:
+        """Add an item to the reservoir, keeps each item of the stream with equal probability"""
+        self.seen += 1
+        if len(self.items) < self.size:
+            self.items.append(item)
+        else:
+            index = self.rng.randrange(self.seen)
+            if index < self.size:
+                self.items[index] = item
 
 
 class SearchFilter(Filter):
@@ -130,3 +168,81 @@ class SearchFilter(Filter):
         for subject in subject_iter:
             if spec.is_satisfied(subject):
                 yield subject
+
+    def filter_many(self, subject_iter: list, specs: dict, budget: SearchBudget = None):
+        """Filter a list of subjects by several specifications, yields the filter name and the subject"""
+        budget = budget if budget is not None else SearchBudget()
+        for subject in subject_iter:
+            for filter_name, spec in specs.items():
+                if spec.is_satisfied(subject):
+                    yield filter_name, subject
+                budget.check(filter_name)
+
+    def sample_many(
+        self,
+        subject_iter: list,
+        specs: dict,
+        size: int,
+        max_scan: int = None,
+        seed: int = None,
+        budget: SearchBudget = None,
+    ) -> dict:
+        """Sample the matches of several specifications uniformly, scans at most max_scan subjects
+
+        Returns per filter the sampled subjects and the total number of matches, estimated from the scanned
+        fraction if the scan stopped early. The scanned subjects of a list are drawn at random positions, a
+        prefix of a sorted source would skew the estimate towards its first folders.
+        """
+        budget = budget if budget is not None else SearchBudget()
+        rng = random.Random(seed)
+        reservoirs = {filter_name: Reservoir(size, rng) for filter_name in specs}
+
+        scanned = 0
+        for subject in _scan(subject_iter, max_scan, rng):
+            scanned += 1
+            for filter_name, spec in specs.items():
+                if spec.is_satisfied(subject):
+                    reservoirs[filter_name].add(subject)
+                budget.check(filter_name)
+
+        total = len(subject_iter) if hasattr(subject_iter, '__len__') else scanned
+        samples = {}
+        for filter_name, reservoir in reservoirs.items():
+            estimated_total = round(reservoir.seen * total / scanned) if scanned else 0
+            samples[filter_name] = (reservoir.items, estimated_total)
+        return samples
+
+
+def _scan(subject_iter: list, max_scan: int or None, rng: random.Random):
+    """Iterate over at most max_scan subjects, drawn at random positions of a list in source order"""
+
+    if max_scan is not None and hasattr(subject_iter, '__getitem__') and len(subject_iter) > max_scan:
+        positions = sorted(rng.sample(range(len(subject_iter)), max_scan))
+        return (subject_iter[position] for position in positions)
+    return islice(subject_iter, max_scan)
+
+
+def compile_search_statements(filter_statements: dict) -> dict:
+    """Compile filter statements into specifications, identical leaves are shared across all filters"""
+
+    leaves = {}
+    specs = {}
+    for filter_name, filter_statement in filter_statements.items():
+        specs[filter_name] = _share_leaves(eval(filter_statement), leaves, filter_name)
+    return specs
+
+
+def _share_leaves(spec: Specification, leaves: dict, filter_name: str) -> Specification:
+    """Replace identical leaves of a specification tree with one shared instance"""
+
+    if isinstance(spec, LeafSpecification):
+        for pattern in spec.args:
+            check_regex(filter_name, pattern)  # fail fast on patterns prone to catastrophic backtracking
+        return leaves.setdefault(spec.key, spec)
+
+    if isinstance(spec, NotSpecification):
+        spec.spec = _share_leaves(spec.spec, leaves, filter_name)
+    elif isinstance(spec, (AndSpecification, OrSpecification)):
+        spec.args = tuple(_share_leaves(arg, leaves, filter_name) for arg in spec.args)
+
+    return spec
@@ -0,0 +1,238 @@
+# pylint: disable=no-member  # the opcodes of the regex parser are created at runtime
+import re
+import sys
+import time
+from functools import lru_cache
+
+# The regex parser is private, python 3.11 renamed sre_parse and sre_constants to re._parser and re._constants and
+# deprecated the old names. Its parse tree is only read here, to check user regexes before they are compiled.
+if sys.version_info >= (3, 11):
+    from re import _constants as sre_constants
+    from re import _parser as sre_parse
+else:
+    import sre_constants  # pylint: disable=deprecated-module
+    import sre_parse  # pylint: disable=deprecated-module
+
+UNBOUNDED_REPEATS = (sre_constants.MAX_REPEAT, sre_constants.MIN_REPEAT)
+CATEGORIES = {  # category name of the parser -> equivalent regex, to test a character against it
+    'CATEGORY_DIGIT': r'\d',
+    'CATEGORY_NOT_DIGIT': r'\D',
+    'CATEGORY_SPACE': r'\s',
+    'CATEGORY_NOT_SPACE': r'\S',
+    'CATEGORY_WORD': r'\w',
+    'CATEGORY_NOT_WORD': r'\W',
+}
+
+
+class RegexSafetyError(ValueError):
+    """Raised when a user regex contains a construct prone to catastrophic backtracking"""
+
+    def __init__(self, filter_name: str, pattern: str, reason: str) -> None:
+        self.filter_name = filter_name
+        self.pattern = pattern
+        self.reason = reason
+        super().__init__(f'Filter {filter_name}: regex "{pattern}" is unsafe, {reason}')
+
+
+class SearchTimeoutError(TimeoutError):
+    """Raised when a search exceeds its time budget"""
+
+    def __init__(self, filter_name: str, time_budget: float) -> None:
+        self.filter_name = filter_name
+        self.time_budget = time_budget
+        super().__init__(f'Filter {filter_name}: search exceeded the time budget of {time_budget} seconds')
+
+
+@lru_cache(maxsize=1024)
+def find_unsafe_construct(pattern: str) -> str or None:
+    """Return the reason why a regex is prone to catastrophic backtracking, None if it looks safe"""
+
+    try:
+        parsed = sre_parse.parse(pattern)
+    except re.error:
+        return None  # invalid regexes are reported where they are compiled
+    return _walk(parsed, in_repeat=False)
+
+
+def check_regex(filter_name: str, pattern: str) -> None:
+    """Raise a RegexSafetyError if a regex is prone to catastrophic backtracking"""
+
+    reason = find_unsafe_construct(pattern) if pattern is not None else None
+    if reason is not None:
+        raise RegexSafetyError(filter_name, pattern, reason)
+
+
+def _is_repeating(op, av) -> bool:
+    """Check if a node can match its body a variable number of times, fixed counts like {4} do not backtrack"""
+    return op in UNBOUNDED_REPEATS and av[1] > 1 and av[0] != av[1]
+
+
+def _can_match(body, char: int) -> bool:
+    """Check if the body of a repeat can match a character, True if it is not known"""
+
+    if len(body) != 1:
+        return True
+    return _atom_matches(body[0], char)
+
+
+def _atom_matches(atom, char: int) -> bool:
+    """Check if a single character node can match a character, True if it is not known"""
+
+    if atom is None:
+        return True
+
+    op, av = atom
+    if op == sre_constants.LITERAL:
+        return av == char
+    if op == sre_constants.NOT_LITERAL:
+        return av != char
+    if op == sre_constants.ANY:
+        return char != ord('\n')
+    return _set_matches(av, char) if op == sre_constants.IN else True
+
+
+def _set_matches(items, char: int) -> bool:
+    """Check if a character set like [^a-z_] can match a character, True if it is not known"""
+
+    negate, matched = False, False
+    for item_op, item_av in items:
+        if item_op == sre_constants.NEGATE:
+            negate = True
+        elif item_op == sre_constants.LITERAL:
+            matched = matched or item_av == char
+        elif item_op == sre_constants.RANGE:
+            matched = matched or item_av[0] <= char <= item_av[1]
+        elif item_op == sre_constants.CATEGORY and str(item_av) in CATEGORIES:
+            matched = matched or re.fullmatch(CATEGORIES[str(item_av)], chr(char)) is not None
+        else:
+            return True
+    return matched != negate
+
+
+def _first_atoms(parsed) -> tuple[list, bool]:
+    """Get the nodes which can match the first character of a sequence and if the sequence can match nothing
+
+    Nodes which are not understood are None, they can match any character.
+    """
+
+    atoms = []
+    for op, av in parsed:
+        if op in (sre_constants.LITERAL, sre_constants.NOT_LITERAL, sre_constants.IN, sre_constants.ANY):
+            return atoms + [(op, av)], False
+        if op in (sre_constants.AT, sre_constants.ASSERT, sre_constants.ASSERT_NOT):
+            continue  # zero width
+        if op == sre_constants.SUBPATTERN:
+            body_atoms, nullable = _first_atoms(av[3])
+        elif op in UNBOUNDED_REPEATS or op == getattr(sre_constants, 'POSSESSIVE_REPEAT', None):
+            body_atoms, nullable = _first_atoms(av[2])
+            nullable = nullable or av[0] == 0
+        elif op == sre_constants.BRANCH:
+            alternatives = [_first_atoms(item) for item in av[1]]
+            body_atoms = [atom for item_atoms, _ in alternatives for atom in item_atoms]
+            nullable = any(item_nullable for _, item_nullable in alternatives)
+        else:
+            return atoms + [None], False
+
+        atoms.extend(body_atoms)
+        if not nullable:
+            return atoms, False
+    return atoms, True
+
+
+def _probe_chars(atoms: list) -> set:
+    """Get characters which show if character nodes overlap, their literals, range ends and common characters"""
+
+    chars = {ord(char) for char in '0aA_ -.\u00e9'}
+    for atom in atoms:
+        if atom is None:
+            continue
+        op, av = atom
+        if op in (sre_constants.LITERAL, sre_constants.NOT_LITERAL):
+            chars.update((av, av + 1))
+        elif op == sre_constants.IN:
+            for item_op, item_av in av:
+                if item_op == sre_constants.LITERAL:
+                    chars.add(item_av)
+                elif item_op == sre_constants.RANGE:
+                    chars.update(item_av)
+    return chars
+
+
+def _overlap(atoms: list, other_atoms: list) -> bool:
+    """Check if two sets of first character nodes can match the same character"""
+
+    chars = _probe_chars(atoms + other_atoms)
+    return any(
+        any(_atom_matches(atom, char) for atom in atoms) and any(_atom_matches(atom, char) for atom in other_atoms)
+        for char in chars
+    )
+
+
+def _are_ambiguous(alternatives: list) -> bool:
+    """Check if alternatives can start with the same character or one of them can match nothing
+
+    The parser moves a common prefix out of the alternatives, a|aa becomes a(?:|a), so a prefix shows as an
+    empty alternative.
+    """
+
+    first = [_first_atoms(item) for item in alternatives]
+    if any(nullable for _, nullable in first):
+        return True
+    return any(_overlap(first[i][0], first[j][0]) for i in range(len(first)) for j in range(i + 1, len(first)))
+
+
+def _is_delimited(op, av, parsed) -> bool:
+    """Check if the only repeat of a sequence is delimited by a mandatory literal which it can not match
+
+    In (_\\d+)* or ([a-z]+_)* every iteration of the outer repeat has a single way to split the input, in
+    (\\d+_\\d+)* the digits between two delimiters can still be split between two iterations.
+    """
+
+    if sum(1 for item_op, item_av in parsed if _is_repeating(item_op, item_av)) != 1:
+        return False
+
+    return any(
+        sibling_op == sre_constants.LITERAL and not _can_match(av[2], sibling_av)
+        for sibling_op, sibling_av in parsed
+        if (sibling_op, sibling_av) != (op, av)
+    )
+
+
+def _walk(parsed, in_repeat: bool) -> str or None:
+    """Walk a parsed regex and look for nested quantifiers and overlapping alternatives"""
+
+    for op, av in parsed:
+        if op in UNBOUNDED_REPEATS:
+            if in_repeat and _is_repeating(op, av) and not _is_delimited(op, av, parsed):
+                return 'nested quantifiers like (a+)+ can backtrack exponentially'
+            reason = _walk(av[2], in_repeat or av[1] > 1)  # a fixed count like (.*a){12} still backtracks
+        elif op == sre_constants.SUBPATTERN:
+            reason = _walk(av[3], in_repeat)
+        elif op == sre_constants.BRANCH:
+            if in_repeat and _are_ambiguous(av[1]):
+                return 'repeated overlapping alternatives like (a|aa)* can backtrack exponentially'
+            reason = next((r for r in (_walk(item, in_repeat) for item in av[1]) if r is not None), None)
+        elif op in (sre_constants.ASSERT, sre_constants.ASSERT_NOT):
+            reason = _walk(av[1], in_repeat)
+        elif op == sre_constants.GROUPREF_EXISTS:
+            reason = next((r for r in (_walk(item, in_repeat) for item in av[1:] if item) if r is not None), None)
+        else:  # literals, character sets, anchors, atomic groups and possessive repeats do not backtrack
+            reason = None
+
+        if reason is not None:
+            return reason
+
+    return None
+
+
+class SearchBudget:
+    """Time budget shared by all filters of a search"""
+
+    def __init__(self, time_budget: float = None) -> None:
+        self.time_budget = time_budget
+        self._deadline = None if time_budget is None else time.monotonic() + time_budget
+
+    def check(self, filter_name: str) -> None:
+        """Raise a SearchTimeoutError naming the filter which was evaluated when the budget ran out"""
+        if self._deadline is not None and time.monotonic() > self._deadline:
+            raise SearchTimeoutError(filter_name, self.time_budget)
@@ -35,12 +35,14 @@ def tokenize_filter_string(text):
     return tokens
 
 
-def create_filter_logic(tokens, search_type):
-    """Create a filter string from a list of tokens"""
+def create_filter_logic(tokens, search_type, **options):
+    """Create a filter string from a list of tokens, enabled options are passed to the search type"""
 
     if tokens is None:
         return None
 
+    options = ''.join(f', {key}=True' for key, value in options.items() if value)  # e.g. fold=True
+
     result = ''
     for token in tokens:  # create a filter string from the tokens
         if token == '[':
@@ -50,9 +52,9 @@ def create_filter_logic(tokens, search_type):
         elif token in ('&', '|'):
             result += f' {token}'
         elif '~' in token:
-            result += f' ~{search_type}("{token[1:]}")'
+            result += f' ~{search_type}("{token[1:]}"{options})'
         else:
-            result += f' {search_type}("{token}")'
+            result += f' {search_type}("{token}"{options})'
 
     if result != '':
         result = f'({result.lstrip()})'
@@ -70,7 +72,8 @@ def create_search_statements(searches: dict):
         ):
             search_tag = searches[search_name][tag]
             search_tokens = tokenize_filter_string(search_tag)
-            search_filter = create_filter_logic(search_tokens, search_class)
+            fold = searches[search_name].get('ignore_case')  # case insensitive and unicode normalized
+            search_filter = create_filter_logic(search_tokens, search_class, fold=fold)
             if search_filter is not None:
                 store[search_name].append(search_filter)
 
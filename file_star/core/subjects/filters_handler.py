@@ -1,10 +1,23 @@
 import copy
 import os
+from collections import Counter
 
 from file_star.core.handler import Handler
 
+STATES = ('original', 'search', 'file_modifications', 'folder_modifications')
+
 
 class FiltersHandler(Handler):
+    def __init__(self):
+        super().__init__()
+        self._versions = {}
+        self._aggregations = {}
+        self._filter_aggregations = {}  # subjects iterator token -> aggregation
+
+    def get_version(self, state: str) -> int:
+        """Get the version of a state, it increases every time the state is set"""
+        return self._versions.get(state, 0)
+
     def get_subjects_per_filters(self, state: str, filter_name: str = None, attribute: str = None) -> dict:
         """Get a list of attributes from a filter of subjects"""
 
@@ -52,6 +65,24 @@ class FiltersHandler(Handler):
             f'Valid names are: original, search, file_modifications, folder_modifications'
         )
 
+    def get_subjects_page_per_state(self, state: str, start: int, stop: int) -> list:
+        """Get a page of subjects per filter without copying, lazy states only compute the page"""
+
+        if state is None:
+            raise AttributeError('No state provided')
+
+        if hasattr(self, state):
+            state_attr = getattr(self, state)
+            subjects = []
+            for filter_name in vars(state_attr):
+                subjects.extend(getattr(state_attr, filter_name).get_page(start, stop))
+            return subjects
+
+        raise AttributeError(
+            f'State {state} does not exist.'
+            f'Valid names are: original, search, file_modifications, folder_modifications'
+        )
+
     def set(self, state: str, filters_iter) -> None:
         """Add subjects_iterator to a filter group"""
 
@@ -60,27 +91,68 @@ class FiltersHandler(Handler):
 
         if hasattr(self, state):
             setattr(self, state, filters_iter)
+            self._versions[state] = self.get_version(state) + 1
+            self._evict_aggregations()
         else:
             raise AttributeError(
                 f'State {state} does not exist.'
                 f'Valid names are: original, search, file_modifications, folder_modifications'
             )
 
+    def _evict_aggregations(self) -> None:
+        """Drop the filter aggregations of subjects iterators which no state references anymore"""
+
+        tokens = set()
+        for state in STATES:
+            filters_iter = getattr(self, state)
+            if filters_iter is not None:
+                tokens.update(filters_iter[filter_name].token for filter_name in filters_iter.get_keys())
+
+        self._filter_aggregations = {
+            token: aggregation for token, aggregation in self._filter_aggregations.items() if token in tokens
+        }
+
     def analyze_state(self, state: str) -> dict:
         """Analyze a search"""
 
+        return self.aggregate_state(state)
+
+    def aggregate_state(self, state: str) -> dict:
+        """Count files, distinct top level folders and extensions per filter, cached until the state changes"""
+
         if state is None:
             raise AttributeError('No state provided')
 
         if not hasattr(self, state):
             raise AttributeError('Invalid state provided.')
 
+        version = self.get_version(state)
+        if state in self._aggregations and self._aggregations[state][0] == version:
+            return self._aggregations[state][1]
+
         filters_iter = getattr(self, state)
-        analysis = {}
-        for filter_name, subjects_iter in filters_iter.get_per_filter(attribute=None).items():
-            analysis[filter_name] = {}
-            analysis[filter_name]['files'] = len(subjects_iter)
-            top_level_folders = len({subject.folder_path_rel.split(os.sep)[0] for subject in subjects_iter})
-            analysis[filter_name]['top_level_folders'] = top_level_folders
-
-        return analysis
+        aggregation = {}
+        for filter_name in filters_iter.get_keys():
+            subjects_iter = filters_iter[filter_name]
+            if subjects_iter.token not in self._filter_aggregations:  # unchanged filters are not counted again
+                self._filter_aggregations[subjects_iter.token] = self._aggregate(subjects_iter.get_originals())
+            aggregation[filter_name] = self._filter_aggregations[subjects_iter.token]
+
+        self._aggregations[state] = (version, aggregation)
+        return aggregation
+
+    @staticmethod
+    def _aggregate(subjects: list) -> dict:
+        """Count files, distinct top level folders and extensions in one streaming pass"""
+
+        top_level_folders = set()
+        extensions = Counter()
+        for subject in subjects:
+            top_level_folders.add(subject.folder_path_rel.split(os.sep, 1)[0])
+            extensions[subject.extension] += 1
+
+        return {
+            'files': len(subjects),
+            'top_level_folders': len(top_level_folders),
+            'extensions': dict(extensions),
+        }
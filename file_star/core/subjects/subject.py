@@ -1,5 +1,14 @@
 import json
 import os
+import unicodedata
+
+
+def fold_name(name: str) -> str:
+    """NFC normalize a name for unicode normalized matching, the case is ignored by the patterns
+
+    Not casefolded, re does no full case folding and a pattern like straße would not match the folded strasse.
+    """
+    return unicodedata.normalize('NFC', name)
 
 
 class Subject:
@@ -13,6 +22,11 @@ class Subject:
         self._file_path_rel = None
         self._folder_path_abs = None
         self._folder_path_rel = None
+        self._folder_names = None
+
+        self._file_base_name_folded = None
+        self._extension_folded = None
+        self._folder_names_folded = None
 
         self._new_file_name = None
         self._new_extension = None
@@ -94,6 +108,46 @@ class Subject:
         """Set the folder path relative"""
         self._folder_path_rel = value
 
+    @property
+    def folder_names(self) -> list:
+        """Get the folder names of the relative folder path"""
+        return self._folder_names
+
+    @folder_names.setter
+    def folder_names(self, value: list) -> None:
+        """Set the folder names of the relative folder path"""
+        self._folder_names = value
+
+    @property
+    def file_base_name_folded(self) -> str:
+        """Get the NFC normalized file base name"""
+        return self._file_base_name_folded
+
+    @file_base_name_folded.setter
+    def file_base_name_folded(self, value: str) -> None:
+        """Set the NFC normalized file base name"""
+        self._file_base_name_folded = value
+
+    @property
+    def extension_folded(self) -> str:
+        """Get the NFC normalized extension"""
+        return self._extension_folded
+
+    @extension_folded.setter
+    def extension_folded(self, value: str) -> None:
+        """Set the NFC normalized extension"""
+        self._extension_folded = value
+
+    @property
+    def folder_names_folded(self) -> list:
+        """Get the NFC normalized folder names"""
+        return self._folder_names_folded
+
+    @folder_names_folded.setter
+    def folder_names_folded(self, value: list) -> None:
+        """Set the NFC normalized folder names"""
+        self._folder_names_folded = value
+
     @property
     def new_file_name(self) -> str:
         """Get the new file name"""
@@ -147,6 +201,11 @@ class Subject:
         self._file_path_rel = os.path.relpath(self._file_path_abs, self._search_path)
         self._folder_path_abs = os.path.dirname(self._file_path_abs)
         self._folder_path_rel = os.path.dirname(self._file_path_rel)
+        self._folder_names = self._folder_path_rel.split(os.sep)
+
+        self._file_base_name_folded = fold_name(self._file_base_name)  # paid once per file for folded searches
+        self._extension_folded = fold_name(self._extension)
+        self._folder_names_folded = [fold_name(folder_name) for folder_name in self._folder_names]
 
         self._new_file_name = self._file_base_name
         self._new_extension = self._extension
@@ -1,10 +1,17 @@
+import copy
+from itertools import count
+
 from file_star.core.subjects.subject import Subject
 
+TOKENS = count()  # every new subjects iterator gets a unique token
+PAGE_SIZE = 1000  # subjects computed at once by lazy subjects iterators
+
 
 class SubjectsIterator:
     def __init__(self, subjects: list[Subject]) -> None:
         self._subjects = subjects
         self._index = 0
+        self.token = next(TOKENS)  # identifies the content, reused iterators keep their token
 
     def __iter__(self):
         return self
@@ -28,3 +35,58 @@ class SubjectsIterator:
     def reset_index(self) -> None:
         """Reset the index to 0"""
         self._index = 0
+
+    def get_page(self, start: int, stop: int) -> list:
+        """Get a slice of the subjects"""
+        return self._subjects[start:stop]
+
+    def get_originals(self) -> list:
+        """Get subjects whose original attributes are valid, new attributes may not be computed yet"""
+        return self._subjects
+
+
+class LazySubjectsIterator(SubjectsIterator):
+    """Subjects which are modified by a plan on demand, page by page"""
+
+    def __init__(self, source: SubjectsIterator, plan, page_size: int = PAGE_SIZE, memo=None) -> None:
+        super().__init__([None] * len(source))
+        self._source = source
+        self._plan = plan
+        self._memo = memo
+        self._page_size = page_size
+        self._computed_pages = set()
+
+    def __next__(self) -> Subject:
+        if self._index < len(self._subjects):
+            self._compute(self._index, self._index + 1)
+        return super().__next__()
+
+    def get(self, attribute: str = None) -> list:
+        """Get a list of attributes from a filter of subjects, computes all pages"""
+        self._compute(0, len(self._subjects))
+        return super().get(attribute)
+
+    def get_page(self, start: int, stop: int) -> list:
+        """Get a slice of the subjects, computes only the pages of the slice"""
+        self._compute(start, stop)
+        return super().get_page(start, stop)
+
+    def get_originals(self) -> list:
+        """Get subjects whose original attributes are valid, new attributes may not be computed yet"""
+        return self._source.get_originals()
+
+    def is_computed(self) -> bool:
+        """Check if all pages are computed"""
+        return len(self._computed_pages) * self._page_size >= len(self._subjects)
+
+    def _compute(self, start: int, stop: int) -> None:
+        """Compute the missing pages overlapping the range start to stop"""
+
+        stop = min(stop, len(self._subjects))
+        for page in range(start // self._page_size, -(-stop // self._page_size)):
+            if page not in self._computed_pages:
+                page_start = page * self._page_size
+                page_stop = min(page_start + self._page_size, len(self._subjects))
+                subjects = copy.deepcopy(self._source.get_page(page_start, page_stop))  # source stays untouched
+                self._subjects[page_start:page_stop] = self._plan.apply_subjects(subjects, memo=self._memo)
+                self._computed_pages.add(page)
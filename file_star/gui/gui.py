@@ -1,6 +1,24 @@
-from nicegui import ui
-
+import os
+
+from nicegui import run, ui
+
+from file_star.core.export import (
+    ARCHIVE_FORMATS,
+    ARCHIVE_NAME,
+    EXPORT_STRATEGIES,
+    MANIFEST_NAME,
+    ExportCancelledError,
+    ExportOptions,
+    ExportProgress,
+)
 from file_star.core.mods.filter_logic import FilterLogic
+from file_star.core.mods.folder.folder_helpers import (
+    DestinationCollisionError,
+    check_destination_collisions,
+    resolve_destination_collisions,
+)
+from file_star.core.mods.memo_store import MemoStore
+from file_star.core.mods.search import RegexSafetyError, SearchTimeoutError
 from file_star.core.subjects.filters_handler import FiltersHandler
 from file_star.core.subjects.filters_iterator import FiltersIterator
 from file_star.core.subjects.subject_creator import SubjectCreator
@@ -17,6 +35,12 @@ class FileStar:
 
         self.expand = {'search': True, 'file_modifications': True, 'folder_modifications': True}
         self.show_tree = {'original': True, 'search': True, 'file_modifications': True, 'folder_modifications': True}
+        self.lazy_preview = {'active': False, 'size': 1000}
+        self.sampling = {'active': False, 'size': 10000}
+        self.memo_cache = {'active': False}  # the switch state, the store is opened by it and on reset
+        self.mod_processes = {'active': False, 'workers': os.cpu_count() or 1}  # opt in, only faster on many cores
+        self.export_options = ExportOptions()
+        self.export_progress = None  # progress of the running export
 
         self.gui_handler = GuiHandler()
         self.filter_logic = FilterLogic()
@@ -50,6 +74,39 @@ class FileStar:
 
         with ui.left_drawer().classes('bg-blue-100 w-full h-full').props('width=400'):
             ui.button(text='Set Source', icon='input', on_click=self.pick_source).classes('w-full')
+            ui.button(text='Export from manifest', icon='list_alt', on_click=self.export_manifest).classes(
+                'w-full'
+            ).tooltip(
+                f'Pick a folder with a {MANIFEST_NAME} of a dry run and a destination, the plan is exported with '
+                f'the export options'
+            )
+            ui.switch(text='Lazy preview', value=self.lazy_preview['active']).bind_value(
+                self.lazy_preview, 'active'
+            ).tooltip(
+                'Modifications are only computed for the first files per filter shown in the tree, '
+                'the remaining files are computed on export'
+            )
+            with ui.row().classes('w-full no-wrap'):
+                ui.switch(text='Sample', value=self.sampling['active']).bind_value(self.sampling, 'active').tooltip(
+                    'Run the pipeline on a sample stratified by top level folder and extension, '
+                    'totals and collisions are estimated, export runs on all files'
+                )
+                ui.number(label='Sample size', value=self.sampling['size'], format='%d', min=1).bind_value(
+                    self.sampling, 'size', forward=lambda value: int(value) if value else 1
+                )
+            with ui.row().classes('w-full no-wrap'):
+                ui.switch(text='Processes', value=self.mod_processes['active']).bind_value(
+                    self.mod_processes, 'active'
+                ).tooltip(
+                    'Apply the modifications of filters with more than 100000 files in worker processes, '
+                    'starting them costs more than it saves on few cores'
+                )
+                ui.number(label='Worker processes', value=self.mod_processes['workers'], format='%d', min=1).bind_value(
+                    self.mod_processes, 'workers', forward=lambda value: int(value) if value else 1
+                )
+            ui.switch(text='Memo cache', on_change=self.switch_memo_store).bind_value(
+                self.memo_cache, 'active'
+            ).tooltip('Reuse the renames of unchanged files and rules from previous sessions, stored on disk')
             self.left_drawer_update()
 
     @ui.refreshable
@@ -63,7 +120,7 @@ class FileStar:
                 value=self.expand['search'],
                 on_value_change=lambda e: self.expand.update({'search': e.value}),
             ).classes('w-full').props('header-class="bg-primary text-white font-bold text-lg"'):
-                self.search_widget.get_widget(self.process_search)
+                self.search_widget.get_widget(self.process_search, self.preview_search)
 
         if self.gui_handler.search:
             with ui.expansion(
@@ -94,6 +151,67 @@ class FileStar:
             ).classes(
                 'w-full'
             ).props('header-class="bg-primary text-white font-bold text-lg"'):
+                if self.filter_logic.sample_weights is not None:
+                    ui.button(text='Run on all files', icon='all_inclusive', on_click=self.run_full_pipeline).classes(
+                        'w-full'
+                    )
+                ui.select(options=list(EXPORT_STRATEGIES), label='Export mode').bind_value(
+                    self.export_options, 'strategy'
+                ).classes('w-full').tooltip(
+                    'Hardlink, reflink, move and symlink do not copy bytes on the same file system, '
+                    'files fall back to a copy otherwise. Move removes the files from the source, also after a copy'
+                )
+                ui.number(label='Export threads', value=self.export_options.workers, format='%d', min=1).bind_value(
+                    self.export_options, 'workers', forward=lambda value: int(value) if value else 1
+                ).classes('w-full')
+                ui.checkbox(text='Copy permissions').bind_value(self.export_options, 'copy_metadata')
+                ui.checkbox(text='Resume').bind_value(self.export_options, 'resume').tooltip(
+                    'Skip the files completed by an interrupted export into the same destination'
+                )
+                ui.checkbox(text='Sync').bind_value(self.export_options, 'sync').tooltip(
+                    'Copy only new or changed files, targets are compared by size and modification time'
+                )
+                ui.checkbox(text='Compare content').bind_value(self.export_options, 'checksum').bind_visibility_from(
+                    self.export_options, 'sync'
+                ).tooltip('Compare unchanged sized targets by a hash of their content instead of the modification time')
+                ui.checkbox(text='Delete files not in the plan').bind_value(
+                    self.export_options, 'delete'
+                ).bind_visibility_from(self.export_options, 'sync').tooltip(
+                    'Delete the files of the previous export which are not exported by the current filters'
+                )
+                ui.select(
+                    options={None: 'Off', 'hardlink': 'Hardlink duplicates', 'manifest': 'Record duplicates'},
+                    label='Deduplicate',
+                ).bind_value(self.export_options, 'dedup').classes('w-full').tooltip(
+                    'Export byte identical files once, duplicates are hardlinked or recorded in a manifest'
+                )
+                ui.select(
+                    options={None: 'Folder', **{name: name for name in ARCHIVE_FORMATS}}, label='Export to'
+                ).bind_value(self.export_options, 'archive').classes('w-full').tooltip(
+                    'Stream the files into an archive in the destination folder instead of copying them, '
+                    'zip_store does not compress'
+                )
+                ui.number(label='Volume size (GB)', min=0).bind_value(
+                    self.export_options,
+                    'volume_size',
+                    forward=lambda value: int(value * 1e9) if value else None,
+                    backward=lambda value: value / 1e9 if value else None,
+                ).bind_visibility_from(
+                    self.export_options, 'archive', backward=lambda value: value is not None
+                ).classes(
+                    'w-full'
+                ).tooltip(
+                    'Split the archive into volumes, empty for a single archive'
+                )
+                ui.checkbox(text='Check free space').bind_value(self.export_options, 'preflight').tooltip(
+                    'Sum the bytes per target file system and stop before copying if they do not fit'
+                )
+                ui.checkbox(text='Order by disk locality').bind_value(self.export_options, 'locality').tooltip(
+                    'Copy in the on disk order of the sources, grouped by target folder, fewer seeks on hard disks'
+                )
+                ui.button(text='Dry run', icon='list_alt', on_click=self.dry_run).classes('w-full').tooltip(
+                    'Write the source to target plan to a manifest instead of exporting'
+                )
                 ui.button(text='Export', icon='output', on_click=self.export).classes('w-full')
 
     def tree_view(self) -> None:
@@ -108,7 +226,13 @@ class FileStar:
     def process_search(self) -> None:
         """Process filters"""
 
-        filters_iter, collisions, inactive = self.filter_logic.apply_search(self.filters_handler)
+        try:
+            filters_iter, collisions, inactive = self.filter_logic.apply_search(
+                self.filters_handler, sample_size=self.sampling['size'] if self.sampling['active'] else None
+            )
+        except (RegexSafetyError, SearchTimeoutError) as e:
+            ui.notify(message=str(e), type='negative')
+            return None
 
         if filters_iter is None:
             ui.notify(message='The filters must first be defined before they can be applied', type='info')
@@ -142,10 +266,41 @@ class FileStar:
         self.filters_handler.set(state='search', filters_iter=filters_iter)
         self.update_state(self.filters_handler, state='search', path_type='file_path_rel')
 
+    async def preview_search(self) -> None:
+        """Show a sample of the matches of every filter with the estimated total, without applying the search"""
+
+        try:
+            preview = await run.io_bound(self.filter_logic.preview_search, self.filters_handler)
+        except (RegexSafetyError, SearchTimeoutError) as e:
+            ui.notify(message=str(e), type='negative')
+            return None
+
+        if preview is None:
+            ui.notify(message='The filters must first be defined before they can be previewed', type='info')
+            return None
+
+        with ui.dialog() as preview_dialog, ui.card():
+            preview_dialog.open()
+            ui.label('Search preview:').style('font-size: 20px; font-weight: bold; color: #3874c8')
+            with ui.scroll_area().style('height: 500px; width: 500px;'):
+                for filter_name, (subjects, estimated_total) in preview.items():
+                    ui.label(f'{filter_name}, about {estimated_total} matches, here a sample:').style(
+                        'font-size: 20px; font-weight: bold;'
+                    )
+                    for subject in subjects:
+                        ui.label(subject.file_path_rel).style('font-size: 15px;')
+            ui.button(text='Close', on_click=preview_dialog.close)
+
     def process_file_mods(self) -> None:
         """Process file modifications"""
 
-        filters_iter = self.filter_logic.apply_file_modifications(self.filters_handler)
+        try:
+            filters_iter = self.filter_logic.apply_file_modifications(
+                self.filters_handler, workers=self.get_mod_workers(), lazy=self.lazy_preview['active']
+            )
+        except RegexSafetyError as e:
+            ui.notify(message=str(e), type='negative')
+            return None
 
         if filters_iter is None:
             ui.notify(message='The modifications must first be defined before they can be applied', type='info')
@@ -155,10 +310,20 @@ class FileStar:
         self.expand.update({'search': False})
         self.update_state(self.filters_handler, state='file_modifications', path_type='new_file_path_rel')
 
+    def get_mod_workers(self) -> int or None:
+        """Get the worker processes of the modifications, None applies them in process"""
+        return self.mod_processes['workers'] if self.mod_processes['active'] else None
+
     def process_folder_mods(self) -> None:
         """Process folder modifications"""
 
-        filters_iter = self.filter_logic.apply_folder_modifications(self.filters_handler)
+        try:
+            filters_iter = self.filter_logic.apply_folder_modifications(
+                self.filters_handler, workers=self.get_mod_workers(), lazy=self.lazy_preview['active']
+            )
+        except RegexSafetyError as e:
+            ui.notify(message=str(e), type='negative')
+            return None
 
         if filters_iter is None:
             ui.notify(message='The modifications must first be defined before they can be applied', type='info')
@@ -168,6 +333,61 @@ class FileStar:
         self.expand.update({'file_modifications': False})
         self.update_state(self.filters_handler, state='folder_modifications', path_type='new_file_path_rel')
 
+        if self.lazy_preview['active']:
+            return None  # collisions need all files, they are checked on export
+
+        collisions = check_destination_collisions(filters_iter)
+        if collisions:
+            self.destination_collisions_dialog(collisions)
+
+    def destination_collisions_dialog(self, collisions: dict) -> None:
+        """Show colliding destinations and offer to resolve them with numeric suffixes"""
+
+        def resolve():
+            filters_iter, renamed = resolve_destination_collisions(self.filters_handler.folder_modifications)
+            self.filters_handler.set(state='folder_modifications', filters_iter=filters_iter)
+            self.update_state(self.filters_handler, state='folder_modifications', path_type='new_file_path_rel')
+            collision_dialog.close()
+            ui.notify(message=f'Renamed {renamed} files with numeric suffixes', type='positive')
+
+        with ui.dialog().classes('no-wrap') as collision_dialog, ui.card():
+            collision_dialog.open()
+            ui.label(f'Destination collisions: {len(collisions)}').style(
+                'font-size: 20px; font-weight: bold; color: #3874c8'
+            )
+            with ui.scroll_area().style('height: 500px; width: 500px;'):
+                for target in list(collisions)[:20]:  # limit example collisions to 20
+                    ui.label(target).style('font-size: 20px; font-weight: bold;')
+                    for filter_name, file_path_rel in collisions[target]:
+                        ui.label(f'{filter_name}: {file_path_rel}').style('font-size: 15px; font-weight: bold;')
+            with ui.row():
+                ui.button(text='Resolve', on_click=resolve).tooltip('Add numeric suffixes to the colliding file names')
+                ui.button(text='Close', on_click=collision_dialog.close)
+
+    def switch_memo_store(self, e) -> None:
+        """Open or close the on disk memo of rename results"""
+
+        if e.value and self.filter_logic.memo_store is None:
+            self.filter_logic.memo_store = MemoStore()
+        elif not e.value and self.filter_logic.memo_store is not None:
+            self.filter_logic.memo_store.close()
+            self.filter_logic.memo_store = None
+
+    def run_full_pipeline(self) -> bool:
+        """Switch from the sample to all files and run search, file and folder modifications again"""
+
+        self.sampling['active'] = False
+        for state, process in (
+            ('search', self.process_search),
+            ('file_modifications', self.process_file_mods),
+            ('folder_modifications', self.process_folder_mods),
+        ):
+            version = self.filters_handler.get_version(state)
+            process()
+            if self.filters_handler.get_version(state) == version:  # stopped by a dialog or an error
+                return False
+        return True
+
     async def pick_source(self) -> None:
         """Pick source folder"""
 
@@ -194,7 +414,8 @@ class FileStar:
     def update_state(self, subject_handler, state, path_type) -> None:
         """Update the gui state"""
 
-        self.gui_handler.subject_handler_to_gui_handler(subject_handler, state, path_type)
+        preview_size = self.lazy_preview['size'] if self.lazy_preview['active'] else None
+        self.gui_handler.subject_handler_to_gui_handler(subject_handler, state, path_type, preview_size)
         self.show_gui_tree.refresh()
         self.left_drawer_update.refresh()
 
@@ -207,9 +428,14 @@ class FileStar:
         self.expand = {'search': True, 'file_modifications': True, 'folder_modifications': True}
         self.show_tree = {'original': True, 'search': True, 'file_modifications': True, 'folder_modifications': True}
 
+        if self.filter_logic.memo_store is not None:  # the new filter logic drops the shared store
+            self.filter_logic.memo_store.close()
+
         self.gui_handler = GuiHandler()
         self.filter_logic = FilterLogic()
         self.filters_handler = FiltersHandler()
+        if self.memo_cache['active']:
+            self.filter_logic.memo_store = MemoStore()
 
         self.search_widget = SearchWidget()
         self.file_mod_widget = FileModWidget()
@@ -218,8 +444,27 @@ class FileStar:
         self.left_drawer_update.refresh()
         self.show_gui_tree.refresh()
 
+    async def dry_run(self) -> None:
+        """Pick a folder and write the export plan as manifest into it"""
+
+        manifest_folder = await LocalFolderPicker('~')
+        if manifest_folder is None:
+            return None
+
+        manifest_path = os.path.join(manifest_folder, MANIFEST_NAME)
+        try:
+            records = await run.io_bound(self.filter_logic.write_manifest, self.filters_handler, manifest_path)
+        except (AttributeError, OSError) as e:
+            ui.notify(message=f'Dry run failed: {e}', type='negative')
+            return None
+        ui.notify(message=f'Wrote {records} planned files to {manifest_path}', type='positive')
+
     async def export(self) -> None:
-        """Pick destination folder"""
+        """Pick destination folder and export in the background"""
+
+        if self.export_progress is not None:
+            ui.notify(message='An export is already running', type='info')
+            return None
 
         self.dst_path = await LocalFolderPicker('~')
         if self.dst_path is None:
@@ -231,8 +476,144 @@ class FileStar:
             ui.notify(message='You must first set the destination folder', type='info')
             return None
 
-        self.filter_logic.apply_new_structure(self.filters_handler, self.dst_path)
-        ui.notify(message=f'Copied files to new structure in {self.dst_path}', type='positive')
+        if self.filter_logic.sample_weights is not None and not self.run_full_pipeline():
+            ui.notify(message='The pipeline must run on all files before exporting', type='info')
+            return None
+
+        dst_path = await self.get_export_path(self.dst_path)
+        if dst_path is not None:
+            await self.run_export(self.filter_logic.apply_new_structure, self.filters_handler, dst_path)
+
+    async def export_manifest(self) -> None:
+        """Pick the folder of a manifest and a destination folder, export the plan of the manifest in the background"""
+
+        if self.export_progress is not None:
+            ui.notify(message='An export is already running', type='info')
+            return None
+
+        manifest_folder = await LocalFolderPicker('~')
+        if manifest_folder is None:
+            return None
+
+        manifest_path = os.path.join(manifest_folder, MANIFEST_NAME)
+        if not os.path.isfile(manifest_path):
+            ui.notify(message=f'No {MANIFEST_NAME} found in {manifest_folder}', type='info')
+            return None
+
+        self.dst_path = await LocalFolderPicker('~')
+        if self.dst_path is None:
+            return None
+
+        dst_path = await self.get_export_path(self.dst_path)
+        if dst_path is not None:
+            await self.run_export(self.filter_logic.apply_manifest, manifest_path, dst_path)
+
+    async def get_export_path(self, dst_folder: str) -> str or None:
+        """Get the destination folder or archive path of the export options, None if a deleting sync is declined"""
+
+        if self.export_options.archive is not None:
+            return os.path.join(dst_folder, ARCHIVE_NAME + ARCHIVE_FORMATS[self.export_options.archive])
+        if self.export_options.sync and self.export_options.delete and not await self.confirm_delete(dst_folder):
+            return None
+        return dst_folder
+
+    async def run_export(self, apply, *args) -> None:
+        """Run an export function with the export options in a thread, show its progress and notify its outcome"""
+
+        progress = self.export_progress = ExportProgress()
+        progress_dialog = self.export_progress_dialog(progress)
+        try:
+            report = await run.io_bound(apply, *args, self.export_options, progress)  # the server stays responsive
+        except DestinationCollisionError as e:
+            ui.notify(message=f'{e}, resolve them before exporting', type='negative')
+            return None
+        except (AttributeError, OSError, ValueError) as e:  # e.g. unsupported options, no space or no access
+            ui.notify(message=f'Export failed: {e}', type='negative')
+            return None
+        except ExportCancelledError:
+            ui.notify(message='Export cancelled, it can be resumed into the same destination', type='warning')
+            return None
+        finally:
+            progress_dialog.delete()  # with its update timer
+            self.export_progress = None
+
+        if progress.error_count:
+            ui.notify(message=f'{progress.error_count} files failed to export, resume to retry them', type='warning')
+        if report is not None:
+            ui.notify(message=self.export_report_message(report), type='positive')
+            return None
+        ui.notify(message=f'Exported files to new structure in {self.dst_path}', type='positive')
+
+    @staticmethod
+    async def confirm_delete(dst_path: str) -> bool:
+        """Ask before a synced export deletes the files of the previous export which are not in the plan"""
+
+        with ui.dialog() as delete_dialog, ui.card():
+            ui.label('Delete files').style('font-size: 20px; font-weight: bold; color: #3874c8')
+            ui.label(
+                f'Files exported into {dst_path} by the previous export which are not in the current plan are '
+                f'deleted, unless they were changed since.'
+            )
+            with ui.row():
+                ui.button(text='Delete', color='negative', on_click=lambda: delete_dialog.submit(True))
+                ui.button(text='Cancel', on_click=lambda: delete_dialog.submit(False))
+        confirmed = await delete_dialog
+        delete_dialog.delete()
+        return bool(confirmed)
+
+    @staticmethod
+    def export_progress_dialog(progress: ExportProgress) -> ui.dialog:
+        """Show the progress of an export with pause and cancel, updated twice per second"""
+
+        def update():
+            state = progress.get_state()
+            progress_bar.set_value(state['fraction'])
+            eta = f'{state["eta_seconds"] / 60:.1f} min' if state['eta_seconds'] is not None else '-'
+            files_label.set_text(
+                f'{state["phase"].capitalize()}: {state["done_files"]} of {state["total_files"]} files, '
+                f'{state["done_bytes"] / 1e9:.2f} of {state["total_bytes"] / 1e9:.2f} GB'
+            )
+            rate_label.set_text(f'{state["mb_per_second"]:.1f} MB/s, ETA {eta}')
+            errors_label.set_text(f'Errors: {state["error_count"]}')
+            errors_area.set_text('\n'.join(f'{src}: {message}' for src, message in state['errors'][-10:]))
+            pause_button.set_text('Resume' if state['paused'] else 'Pause')
+
+        def toggle_pause():
+            if progress.is_paused():
+                progress.resume()
+            else:
+                progress.pause()
+            update()
+
+        with ui.dialog().props('persistent') as progress_dialog, ui.card().style('width: 600px;'):
+            ui.label('Export').style('font-size: 20px; font-weight: bold; color: #3874c8')
+            progress_bar = ui.linear_progress(value=0, show_value=False)
+            files_label = ui.label()
+            rate_label = ui.label()
+            errors_label = ui.label()
+            errors_area = ui.label().style('white-space: pre-wrap; font-size: 12px; color: #c10015')
+            with ui.row():
+                pause_button = ui.button(text='Pause', on_click=toggle_pause)
+                ui.button(text='Cancel', on_click=progress.cancel)
+            ui.timer(0.5, update)
+        progress_dialog.open()
+        return progress_dialog
+
+    @staticmethod
+    def export_report_message(report: dict) -> str:
+        """Summarize the report of a synced or deduplicated export"""
+
+        parts = []
+        if 'copied_files' in report:
+            parts.append(f'Synced {report["copied_files"]} files ({report["copied_bytes"] / 1e9:.2f} GB)')
+            parts.append(f'skipped {report["skipped_files"]} unchanged files ({report["skipped_bytes"] / 1e9:.2f} GB)')
+        if 'deleted_files' in report:
+            parts.append(f'deleted {report["deleted_files"]} files')
+        if 'archives' in report:
+            parts.append(f'Archived {report["archived_files"]} files into {len(report["archives"])} archives')
+        if 'duplicate_files' in report:
+            parts.append(f'deduplicated {report["duplicate_files"]} files ({report["duplicate_bytes"] / 1e9:.2f} GB)')
+        return ', '.join(parts)
 
     def tree_menu(self, state) -> None:
         """Tree menu"""
@@ -264,7 +645,11 @@ class FileStar:
                     icon='expand_less',
                     on_click=lambda e: getattr(self.gui_handler, state).tree_gui.props('filter=').collapse(),
                 )
+            preview_size = getattr(self.gui_handler, state).preview_size
+            if preview_size is not None:
+                ui.label(f'Preview of the first {preview_size} files per filter').style('font-size: 15px;')
             analysis = self.filters_handler.analyze_state(state)
+            estimates = self.filter_logic.estimate_state(self.filters_handler, state) if state != 'original' else None
             for filter_name in analysis:
                 file_counts = analysis[filter_name]['files']
                 top_level_folders_count = analysis[filter_name]['top_level_folders']
@@ -275,6 +660,22 @@ class FileStar:
                         'font-size: 15px; font-weight: bold;'
                     )
                     ui.label(f'Files: {file_counts}').style('font-size: 15px; font-weight: bold;')
+                    if estimates is not None:
+                        ui.label(f'Estimated: {estimates[filter_name]}').style(
+                            'font-size: 15px; font-weight: bold;'
+                        ).tooltip(
+                            'Estimated from a sample of at most the sample size, with more top level folder and '
+                            'extension strata than the sample size the files are sampled uniformly and small strata '
+                            'can be missed'
+                        )
+
+            if state == 'folder_modifications':
+                collision_estimate = self.filter_logic.estimate_collisions(self.filters_handler)
+                if collision_estimate is not None:
+                    colliding, rate = collision_estimate
+                    ui.label(f'Estimated colliding files: {colliding} ({rate:.1%})').style(
+                        'font-size: 15px; font-weight: bold;'
+                    )
 
     @ui.refreshable
     def show_gui_tree(self, state) -> None:
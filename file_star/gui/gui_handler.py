@@ -12,19 +12,27 @@ class GuiHandler(Handler):
         subjects_handler: FiltersHandler = None,
         state: str = None,
         path_type: str = None,
+        preview_size: int = None,
     ) -> None:
         """Convert subject_handler to gui_handler"""
 
         if hasattr(self, state):
-            setattr(self, state, GuiHelper(subjects_handler, state, path_type))
+            setattr(self, state, GuiHelper(subjects_handler, state, path_type, preview_size))
 
 
 class GuiHelper:
     """Gui helper"""
 
-    def __init__(self, filters_handler: FiltersHandler = None, state: str = None, path_type: str = None) -> None:
+    def __init__(
+        self,
+        filters_handler: FiltersHandler = None,
+        state: str = None,
+        path_type: str = None,
+        preview_size: int = None,
+    ) -> None:
         self.state = state
         self.filters_handler = filters_handler
+        self.preview_size = preview_size  # only the first subjects per filter are shown and computed
 
         self._tree_format = {}
         self._tree_gui = None
@@ -59,7 +67,10 @@ class GuiHelper:
 
         tree_format = {}
 
-        subjects = self.filters_handler.get_subjects_per_state(self.state)
+        if self.preview_size is None:
+            subjects = self.filters_handler.get_subjects_per_state(self.state)
+        else:
+            subjects = self.filters_handler.get_subjects_page_per_state(self.state, 0, self.preview_size)
 
         file_paths = []
         for subject in subjects:
@@ -266,7 +266,7 @@ class FolderModWidget(FilterLogic):
     def find_folder_by_name_mask(self, filter_name, folder_struct, mod_name):
         """Find folder by name mask"""
 
-        store = {'name': None}
+        store = {'name': None, 'regex': False}
 
         if isinstance(self.folder_modifications[filter_name][folder_struct][mod_name], bool):
             self.folder_modifications[filter_name][folder_struct][mod_name] = store
@@ -288,6 +288,11 @@ class FolderModWidget(FilterLogic):
             ).classes(
                 'w-full no-wrap'
             )
+            ui.checkbox(
+                text='Regex',
+                value=bool(self.folder_modifications[filter_name][folder_struct][mod_name].get('regex')),
+                on_change=lambda x, e=(filter_name, folder_struct, mod_name, 'regex'): helper(*e, x.value),
+            ).tooltip('Match the search tags as regex like in the search, otherwise as plain text')
 
         return card
 
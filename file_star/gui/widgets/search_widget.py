@@ -17,15 +17,15 @@ class SearchWidget(FilterLogic):
         self.search_name = None
         self.remove_checkbox = {}
 
-    def get_widget(self, callback):
+    def get_widget(self, callback, preview=None):
         """Return ui"""
-        return self.tab_view(callback)
+        return self.tab_view(callback, preview)
 
     def search_mask(self, name):
         """Search mask"""
         self.search[name]['search_name'] = name
         for key in self.search[name]:
-            if key == 'search_name':
+            if key in ('search_name', 'ignore_case'):
                 continue
             with ui.row().classes('w-full'):
                 key_to_show = key.replace('_', ' ').title()
@@ -41,8 +41,14 @@ class SearchWidget(FilterLogic):
                     'w-full'
                 )
 
+        ui.checkbox(
+            text='Ignore case',
+            value=bool(self.search[name].get('ignore_case')),
+            on_change=lambda x: self.search[name].update({'ignore_case': x.value}),
+        ).tooltip('Match case insensitive and unicode normalized, e.g. .JPG and .jpg')
+
     @ui.refreshable
-    def tab_view(self, callback):
+    def tab_view(self, callback, preview=None):
         """Tab view for all searches"""
         with ui.row().classes('w-full no-wrap'):
             ui.button('Add Filter').on('click', self.add_dialog)
@@ -63,10 +69,13 @@ class SearchWidget(FilterLogic):
                     with ui.tab_panel(search_name).classes('w-full'):
                         self.search_mask(search_name)
 
-        if self.search:
-            ui.button('Apply', on_click=callback)
-        else:
-            ui.button('Apply', on_click=None).props('hidden')
+        with ui.row().classes('w-full no-wrap'):
+            if self.search:
+                ui.button('Apply', on_click=callback)
+                if preview is not None:
+                    ui.button('Preview', on_click=preview).tooltip('Show a sample of matches and their estimated total')
+            else:
+                ui.button('Apply', on_click=None).props('hidden')
 
     def remove_dialog(self):
         """Remove filter dialog"""
@@ -93,7 +102,13 @@ class SearchWidget(FilterLogic):
     def add_dialog(self):
         """Add filter dialog"""
 
-        template = {'search_name': None, 'file_name': None, 'extension_name': None, 'folder_name': None}
+        template = {
+            'search_name': None,
+            'file_name': None,
+            'extension_name': None,
+            'folder_name': None,
+            'ignore_case': False,
+        }
 
         def add():
             if self.search_name.value:
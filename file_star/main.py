@@ -1,3 +1,4 @@
+import multiprocessing
 import os
 import sys
 
@@ -6,5 +7,8 @@ from nicegui import native, ui
 from file_star.gui.gui import FileStar
 
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
-FileStar()()
-ui.run(reload=False, port=native.find_open_port(), title='File*')  # reload=False for nuitka
+
+if __name__ == '__main__':  # worker processes of the mod pool import this module too
+    multiprocessing.freeze_support()  # worker processes of a frozen build
+    FileStar()()
+    ui.run(reload=False, port=native.find_open_port(), title='File*')  # reload=False for nuitka
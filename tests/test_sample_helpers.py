@@ -0,0 +1,35 @@
+import unittest
+
+from file_star.core.mods.sample_helpers import allocate_sample, stratified_sample
+from file_star.core.subjects.subject import Subject
+
+
+def create_subjects(folders: int, files: int) -> list:
+    return [
+        Subject('/data', f'/data/folder_{folder}/file_{index}.txt')
+        for folder in range(folders)
+        for index in range(files)
+    ]
+
+
+class TestStratifiedSample(unittest.TestCase):
+    def test_more_strata_than_size(self):
+        subjects = create_subjects(50, 4)
+        sample, weights = stratified_sample(subjects, 10, seed=0)
+        self.assertEqual(len(sample), 10)
+        self.assertAlmostEqual(sum(weights.values()), len(subjects))
+
+    def test_rounding_excess(self):
+        subjects = create_subjects(1, 1000) + create_subjects(9, 1)[1:]
+        for size in (10, 20, 100):
+            sample, weights = stratified_sample(subjects, size, seed=0)
+            self.assertLessEqual(len(sample), size)
+            self.assertAlmostEqual(sum(weights.values()), len(subjects))
+
+    def test_allocation(self):
+        self.assertEqual(allocate_sample([range(5)] * 4, 4, 20), [1, 1, 1, 1])
+        self.assertEqual(sum(allocate_sample([range(98), range(1), range(1)], 3, 100)), 3)
+
+
+if __name__ == '__main__':
+    unittest.main()
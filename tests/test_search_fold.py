@@ -0,0 +1,35 @@
+import unicodedata
+import unittest
+
+from file_star.core.mods.search.search_logic import Extension, FileName, FolderNames
+from file_star.core.subjects.subject import Subject
+
+
+def create_subject(file_path_rel: str) -> Subject:
+    return Subject('/data', f'/data/{file_path_rel}')
+
+
+class TestSearchFold(unittest.TestCase):
+    def test_sharp_s(self):
+        subject = create_subject('Straße/Straße_file.txt')
+        self.assertTrue(FileName('straße', fold=True).is_satisfied(subject))
+        self.assertTrue(FileName('STRAẞE', fold=True).is_satisfied(subject))
+        self.assertTrue(FolderNames('^straße$', fold=True).is_satisfied(subject))
+        self.assertTrue(FileName('ẞ', fold=True).is_satisfied(create_subject('strasse_ß.txt')))
+
+    def test_nfd_input(self):
+        subject = create_subject(unicodedata.normalize('NFD', 'Café/Résumé.TXT'))
+        self.assertTrue(FileName('résumé', fold=True).is_satisfied(subject))
+        self.assertTrue(FileName(unicodedata.normalize('NFD', 'RÉSUMÉ'), fold=True).is_satisfied(subject))
+        self.assertTrue(FolderNames('café', fold=True).is_satisfied(subject))
+        self.assertTrue(Extension('txt', fold=True).is_satisfied(subject))
+        self.assertFalse(FileName('résumé').is_satisfied(subject))
+
+    def test_escapes(self):
+        subject = create_subject('Run-01_T1w.nii')
+        self.assertTrue(FileName(r'run-\d+_t1W', fold=True).is_satisfied(subject))
+        self.assertFalse(FileName(r'run-\D', fold=True).is_satisfied(subject))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,48 @@
+import unittest
+
+from file_star.core.mods.search.search_safety import RegexSafetyError, check_regex, find_unsafe_construct
+
+
+class TestSearchSafety(unittest.TestCase):
+    def test_unsafe_constructs(self):
+        for pattern in (
+            r'(a+)+',
+            r'(\d+)*',
+            r'(\w+_)*',
+            r'(a{1,3})+',
+            r'(a|a)*',
+            r'(a|aa)+$',
+            r'(a|a?)+$',
+            r'(a|)+',
+            r'(.|a)*b',
+            r'(.*a){12}',
+            r'(\d+){2}',
+        ):
+            with self.subTest(pattern=pattern):
+                self.assertIsNotNone(find_unsafe_construct(pattern))
+
+    def test_safe_constructs(self):
+        for pattern in (
+            r'run-\d+',
+            r'(?i)(sub|ses)-\d+',
+            r'(\d{4})+',
+            r'(?:x{2})+',
+            r'(_\d+)*',
+            r'(_\d+){3}',
+            r'([a-z]+_)*end',
+            r'(ab|cd)+',
+            r'(\.jpg|\.png)+',
+            r'(\.nii|\.nii\.gz)$',
+        ):
+            with self.subTest(pattern=pattern):
+                self.assertIsNone(find_unsafe_construct(pattern))
+
+    def test_check_regex(self):
+        with self.assertRaises(RegexSafetyError):
+            check_regex('a', r'(a|aa)+$')
+        check_regex('a', None)
+        check_regex('a', r'sub-\d+')
+
+
+if __name__ == '__main__':
+    unittest.main()
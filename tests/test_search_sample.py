@@ -0,0 +1,34 @@
+import unittest
+
+from file_star.core.mods.search.search_logic import FileName, SearchFilter
+from file_star.core.subjects.subject import Subject
+
+
+def create_subjects(folder: str, files: int) -> list:
+    return [Subject('/data', f'/data/{folder}/file_{index}.txt') for index in range(files)]
+
+
+class TestSearchSample(unittest.TestCase):
+    def test_sorted_source(self):
+        subjects = create_subjects('a', 5000) + create_subjects('b', 5000)
+        sample, estimated_total = SearchFilter().sample_many(
+            subjects, {'a': FileName('file')}, 10, max_scan=1000, seed=0
+        )['a']
+        self.assertEqual(len(sample), 10)
+        self.assertEqual(estimated_total, 10000)
+
+        sample, estimated_total = SearchFilter().sample_many(
+            subjects, {'b': FileName('^file_1')}, 10, max_scan=2000, seed=0
+        )['b']
+        self.assertTrue({subject.folder_path_rel for subject in sample} == {'a', 'b'})
+        self.assertAlmostEqual(estimated_total, 2222, delta=400)
+
+    def test_full_scan(self):
+        subjects = create_subjects('a', 100)
+        sample, estimated_total = SearchFilter().sample_many(subjects, {'a': FileName('file_1')}, 5, max_scan=None)['a']
+        self.assertEqual(len(sample), 5)
+        self.assertEqual(estimated_total, 11)
+
+
+if __name__ == '__main__':
+    unittest.main()